@@ -0,0 +1,152 @@
+import math
+import re
+from collections import Counter
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+import metrics
+
+
+MIN_MATCH_SCORE = 0.5
+MIN_KEY_COVERAGE = 0.6
+MAX_RECORDS_SAMPLED = 50
+MAX_DEPTH = 6
+
+STOPWORDS = {
+    'a', 'all', 'an', 'and', 'any', 'are', 'as', 'at', 'by', 'data', 'each', 'every', 'extract',
+    'find', 'for', 'from', 'get', 'give', 'in', 'info', 'information', 'into', 'is', 'it', 'its',
+    'list', 'me', 'of', 'on', 'or', 'page', 'please', 'return', 'show', 'table', 'tables', 'text',
+    'the', 'their', 'them', 'this', 'to', 'what', 'which', 'with',
+}
+
+
+def _stem(word: str) -> str:
+    if len(word) > 4 and word.endswith('ies'):
+        return word[:-3] + 'y'
+    if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+        return word[:-1]
+    return word
+
+
+def _tokens(text: str) -> List[str]:
+    parts = re.sub(r'([a-z])([A-Z])', r'\1 \2', text)
+    return [_stem(w) for w in re.findall(r'[a-z0-9]+', parts.lower())]
+
+
+def query_terms(user_query: str) -> List[str]:
+    terms = []
+    for word in re.findall(r'[a-z0-9]+', user_query.lower()):
+        if word not in STOPWORDS and len(word) > 2:
+            stem = _stem(word)
+            if stem not in terms:
+                terms.append(stem)
+    return terms
+
+
+def find_record_lists(data: Any, path: str = '$', depth: int = 0) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+    """Yield (path, records) for every list of objects inside a JSON document."""
+    if depth > MAX_DEPTH:
+        return
+    if isinstance(data, list):
+        records = [item for item in data if isinstance(item, dict)]
+        if records and len(records) >= len(data) * 0.8:
+            yield path, records
+            for key, value in records[0].items():
+                if isinstance(value, (list, dict)):
+                    yield from find_record_lists(value, f"{path}[0].{key}", depth + 1)
+    elif isinstance(data, dict):
+        for key, value in data.items():
+            if isinstance(value, (list, dict)):
+                yield from find_record_lists(value, f"{path}.{key}", depth + 1)
+
+
+def score_candidate(records: List[Dict[str, Any]], terms: List[str], url: str = '', path: str = '') -> float:
+    """Score how well a list of records answers the query, from 0 to 1.
+
+    Mostly query-term coverage over the record keys (plus the URL and JSON path), with a
+    smaller weight for the number of rows and for how uniform the records' keys are.
+    Records whose keys match fewer than MIN_KEY_COVERAGE of the query terms score 0, so
+    generic queries ("extract all data"), unrelated lists such as analytics beacons and
+    lists that only answer part of the query never win.
+    """
+    if not terms:
+        return 0.0
+    sample = records[:MAX_RECORDS_SAMPLED]
+    key_tokens = set()
+    value_tokens = set()
+    keysets = Counter()
+    for record in sample:
+        keysets[frozenset(record)] += 1
+        for key, value in record.items():
+            key_tokens.update(_tokens(str(key)))
+            if isinstance(value, str) and len(value) < 200:
+                value_tokens.update(_tokens(value))
+    context_tokens = set(_tokens(url.split('?')[0])) | set(_tokens(path))
+    if len(key_tokens.intersection(terms)) / len(terms) < MIN_KEY_COVERAGE:
+        return 0.0
+    hits = 0.0
+    for term in terms:
+        if term in key_tokens:
+            hits += 1
+        elif term in context_tokens:
+            hits += 0.75
+        elif term in value_tokens:
+            hits += 0.5
+    coverage = hits / len(terms)
+    size = min(1.0, math.log10(len(records) + 1) / 2)
+    uniformity = keysets.most_common(1)[0][1] / len(sample)
+    return round(0.7 * coverage + 0.2 * size + 0.1 * uniformity, 4)
+
+
+def rank_responses(json_responses: List[Dict[str, Any]], user_query: str) -> List[Dict[str, Any]]:
+    terms = query_terms(user_query)
+    candidates = []
+    for response in json_responses:
+        for path, records in find_record_lists(response.get('data')):
+            candidates.append({
+                'url': response.get('url', ''),
+                'path': path,
+                'records': records,
+                'score': score_candidate(records, terms, response.get('url', ''), path),
+            })
+    candidates.sort(key=lambda c: (c['score'], len(c['records'])), reverse=True)
+    return candidates
+
+
+def flatten_records(records: List[Dict[str, Any]], user_query: str = '') -> pd.DataFrame:
+    df = pd.json_normalize(records, sep='.')
+    terms = query_terms(user_query)
+    if terms:
+        matched = [c for c in df.columns if set(_tokens(c)) & set(terms)]
+        df = df[matched + [c for c in df.columns if c not in matched]]
+    return df
+
+
+@metrics.timed("api_capture")
+def extract_from_json_responses(json_responses: List[Dict[str, Any]], user_query: str,
+                                min_score: float = MIN_MATCH_SCORE) -> Optional[Dict[str, Any]]:
+    """Build an extract_tabular_data-style result from the best captured JSON response,
+    or return None when nothing matches the query well enough."""
+    if not json_responses:
+        return None
+    ranked = rank_responses(json_responses, user_query)
+    if not ranked or ranked[0]['score'] < min_score:
+        return None
+    best = ranked[0]
+    df = flatten_records(best['records'], user_query)
+    rows = df.astype(object).where(df.notna(), None).to_dict(orient='records')
+    description = f"Extracted from captured API response {best['url']} ({best['path']}, match score {best['score']:.2f})"
+    return {
+        'success': True,
+        'data': {
+            'columns': [str(c) for c in df.columns],
+            'rows': [{'data': row} for row in rows],
+            'description': description,
+        },
+        'dataframe': df,
+        'description': description,
+        'usage': {},
+        'source': 'network_capture',
+        'error': None
+    }
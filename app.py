@@ -1,10 +1,10 @@
 import streamlit as st
 import os
+import time
 from dotenv import load_dotenv
-from scraper import fetch_html_with_info
-from cleaner import clean_html, get_html_stats, extract_text_content
-from extractor import extract_tabular_data, dataframe_to_json
-import pandas as pd
+import metrics
+import jobs
+from storage import get_store
 
 load_dotenv()
 
@@ -15,17 +15,185 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-if 'html_content' not in st.session_state:
-    st.session_state.html_content = None
-if 'cleaned_html' not in st.session_state:
-    st.session_state.cleaned_html = None
+# Large payloads live in the shared PayloadStore; session state only keeps their keys.
+store = get_store()
+
+if 'cleaned_key' not in st.session_state:
+    st.session_state.cleaned_key = None
+if 'text_key' not in st.session_state:
+    st.session_state.text_key = None
+if 'html_stats' not in st.session_state:
+    st.session_state.html_stats = None
 if 'page_info' not in st.session_state:
     st.session_state.page_info = None
-if 'extraction_result' not in st.session_state:
-    st.session_state.extraction_result = None
+if 'capture_key' not in st.session_state:
+    st.session_state.capture_key = None
+if 'extraction_key' not in st.session_state:
+    st.session_state.extraction_key = None
+if 'fetch_timing' not in st.session_state:
+    st.session_state.fetch_timing = None
+if 'extract_timing' not in st.session_state:
+    st.session_state.extract_timing = None
+if 'fetch_job' not in st.session_state:
+    st.session_state.fetch_job = None
+if 'extract_job' not in st.session_state:
+    st.session_state.extract_job = None
+
+JOB_POLL_SECONDS = 1.0
+DATAFRAME_CACHE_ENTRIES = 8
+DOWNLOAD_FORMATS = {
+    'csv': ("CSV", "extracted_data.csv", "text/csv"),
+    'json': ("JSON", "extracted_data.json", "application/json"),
+    'jsonl': ("JSON Lines", "extracted_data.jsonl", "application/jsonl"),
+    'parquet': ("Parquet", "extracted_data.parquet", "application/vnd.apache.parquet"),
+    'arrow': ("Arrow", "extracted_data.arrow", "application/vnd.apache.arrow.file"),
+}
+
+
+def replace_payload(name, key):
+    store.delete(st.session_state.get(name))
+    st.session_state[name] = key
+
+
+def deferred_payload(key):
+    # Download buttons read the payload only when clicked, not on every rerun.
+    return lambda: store.open_stream(key)
+
+
+def has_payload(name):
+    key = st.session_state.get(name)
+    return bool(key) and key in store
+
+
+def track_job(name, job):
+    # Mirrored into the URL so a page reload can pick the running job back up.
+    st.session_state[name] = job.id
+    st.query_params[name] = job.id
+
+
+def forget_job(name):
+    jobs.discard(st.session_state.get(name))
+    st.session_state[name] = None
+    if name in st.query_params:
+        del st.query_params[name]
+
+
+def finish_job(name, job):
+    # A finished job stays in the pool (until JOB_TTL_SECONDS) and in the URL, so a reload
+    # after completion applies its result to the new session instead of losing it.
+    st.session_state[f"{name}_applied"] = job.id
+    st.session_state[name] = None
+
+
+def poll_job(name):
+    job_id = st.session_state.get(name) or st.query_params.get(name)
+    job = jobs.get_job(job_id)
+    if job is None:
+        if job_id:
+            forget_job(name)
+        return None
+    if job.status == jobs.DONE and st.session_state.get(f"{name}_applied") == job.id:
+        return None
+    st.session_state[name] = job.id
+    return job
+
+
+def clear_page_state():
+    st.session_state.page_info = None
+    st.session_state.html_stats = None
+    for name in ('cleaned_key', 'text_key', 'capture_key'):
+        replace_payload(name, None)
+
+
+def apply_fetch_result(result):
+    for name in ('cleaned_key', 'text_key', 'capture_key'):
+        replace_payload(name, result[name])
+    st.session_state.page_info = result['page_info']
+    st.session_state.html_stats = result['html_stats']
+    st.session_state.html_stats['json_response_count'] = result['json_response_count']
+    st.session_state.fetch_timing = result['timing']
+
+
+@st.cache_resource(max_entries=DATAFRAME_CACHE_ENTRIES, show_spinner=False)
+def load_dataframe(key):
+    # Payload keys are never reused, so the unpickled frame can be shared across reruns and sessions.
+    return store.get_object(key)
+
+
+def apply_extract_result(result):
+    previous_key = st.session_state.extraction_key
+    if previous_key and previous_key in store:
+        previous = store.get_object(previous_key)
+        store.delete(previous.get('dataframe_key'))
+        for key in previous.get('exports', {}).values():
+            store.delete(key)
+    replace_payload('extraction_key', result['extraction_key'])
+    st.session_state.extract_timing = result['timing']
+
+
+def render_job_status(job, name):
+    status_col, cancel_col = st.columns([4, 1])
+    with status_col:
+        elapsed = time.time() - (job.started or job.created)
+        st.info(f"⏳ {job.message} ({elapsed:.0f}s, job `{job.id}`)")
+    with cancel_col:
+        if st.button("Cancel", key=f"cancel_{name}", disabled=job.cancel_requested, use_container_width=True):
+            job.cancel()
+            st.rerun()
+
+
+def render_paged_preview(key, widget_key, label=None, language=None):
+    pages = store.chunk_count(key)
+    page = 1
+    if pages > 1:
+        page = st.number_input(
+            f"Page (1-{pages})",
+            min_value=1,
+            max_value=pages,
+            value=1,
+            step=1,
+            key=f"{widget_key}_page"
+        )
+    chunk = store.get_chunk(key, int(page) - 1)
+    if language:
+        st.code(chunk, language=language)
+    else:
+        st.text_area(label, chunk, height=300, disabled=True, key=f"{widget_key}_area")
+
+
+def render_timing_panel(timing, key):
+    import pandas as pd
+    with st.expander("⏱️ Timing Breakdown", expanded=False):
+        st.metric("Total Time", f"{timing['duration_s']:.2f} s")
+        if timing['spans']:
+            spans_df = pd.DataFrame(timing['spans'])
+            columns = ['name', 'duration_s', 'bytes_in', 'bytes_out', 'mem_delta_bytes', 'cache_hit', 'error']
+            st.dataframe(spans_df[[c for c in columns if c in spans_df.columns]], use_container_width=True)
+            st.bar_chart(spans_df.groupby('name', sort=False)['duration_s'].sum())
+        export_col1, export_col2 = st.columns(2)
+        with export_col1:
+            st.download_button(
+                label="Download Spans (JSON Lines)",
+                data=metrics.to_json_lines(timing['spans']),
+                file_name=f"{key}_spans.jsonl",
+                mime="application/jsonl",
+                key=f"{key}_spans_download",
+                use_container_width=True
+            )
+        with export_col2:
+            st.download_button(
+                label="Download Metrics (Prometheus)",
+                data=metrics.to_prometheus(),
+                file_name="metrics.prom",
+                mime="text/plain",
+                key=f"{key}_prom_download",
+                use_container_width=True
+            )
 
 
 def main():
+    fetch_job = poll_job('fetch_job')
+    extract_job = poll_job('extract_job')
     with st.sidebar:
         st.title("⚙️ Configuration")
         groq_api_key = st.text_input(
@@ -52,6 +220,22 @@ def main():
             index=0,
             help="Select the Groq model to use for extraction. Smaller models use fewer tokens and are better for free tier."
         )
+        capture_network = st.checkbox(
+            "📡 Capture JSON API responses",
+            value=False,
+            help="Record the page's XHR/fetch JSON responses while it loads. If one matches your query, "
+                 "the data is taken from it directly, without an LLM call."
+        )
+        collect_timing = st.checkbox(
+            "⏱️ Collect timing metrics",
+            value=metrics.is_enabled(),
+            help="Record per-stage timings, sizes and memory deltas for each fetch and extraction."
+        )
+        pool = jobs.stats()
+        st.caption(
+            f"🧵 Shared workers: {pool['running']}/{pool['workers']} busy, {pool['queued']} queued "
+            f"(max {pool['max_browsers']} browsers, {pool['max_llm_calls']} LLM calls)"
+        )
         st.divider()
         st.markdown("""
         ### 📖 How to Use
@@ -80,21 +264,32 @@ def main():
         if fetch_button:
             if not url_input:
                 st.error("Please enter a URL")
+            elif fetch_job and fetch_job.active:
+                st.warning("A fetch is already running for this session. Cancel it first to start another.")
             else:
-                with st.spinner("Fetching website content..."):
-                    try:
-                        page_info = fetch_html_with_info(url_input, headless=True)
-                        st.session_state.page_info = page_info
-                        cleaned_html = clean_html(page_info['html'], preserve_structure=True)
-                        st.session_state.cleaned_html = cleaned_html
-                        st.session_state.html_content = page_info['html']
-                        st.success(f"✓ Successfully fetched: {page_info['title']}")
-                    except Exception as e:
-                        st.error(f"Error fetching website: {str(e)}")
-                        st.session_state.page_info = None
-                        st.session_state.cleaned_html = None
-                        st.session_state.html_content = None
-        if st.session_state.page_info and st.session_state.cleaned_html:
+                fetch_job = jobs.submit(
+                    'fetch',
+                    jobs.fetch_and_clean,
+                    url_input,
+                    collect_timing=collect_timing,
+                    capture_network=capture_network
+                )
+                track_job('fetch_job', fetch_job)
+        if fetch_job:
+            if fetch_job.status == jobs.DONE:
+                apply_fetch_result(fetch_job.result)
+                st.success(f"✓ Successfully fetched: {st.session_state.page_info['title']}")
+                finish_job('fetch_job', fetch_job)
+            elif fetch_job.status == jobs.FAILED:
+                st.error(f"Error fetching website: {fetch_job.error}")
+                clear_page_state()
+                forget_job('fetch_job')
+            elif fetch_job.status == jobs.CANCELLED:
+                st.info("Fetch cancelled.")
+                forget_job('fetch_job')
+            else:
+                render_job_status(fetch_job, 'fetch_job')
+        if st.session_state.page_info and has_payload('cleaned_key'):
             st.divider()
             st.subheader("📄 Page Information")
             info_col1, info_col2, info_col3 = st.columns(3)
@@ -102,11 +297,10 @@ def main():
                 st.metric("Page Title", st.session_state.page_info['title'])
             with info_col2:
                 st.metric("Final URL", st.session_state.page_info['url'][:50] + "..." if len(st.session_state.page_info['url']) > 50 else st.session_state.page_info['url'])
+            stats = st.session_state.html_stats
             with info_col3:
-                stats = get_html_stats(st.session_state.cleaned_html)
                 st.metric("Elements", stats['element_count'])
             with st.expander("📈 HTML Statistics", expanded=False):
-                stats = get_html_stats(st.session_state.cleaned_html)
                 stats_col1, stats_col2 = st.columns(2)
                 with stats_col1:
                     st.metric("Total Elements", stats['element_count'])
@@ -116,27 +310,30 @@ def main():
                     st.metric("Links", stats['link_count'])
                     st.metric("Images", stats['image_count'])
                     st.metric("Tables", stats['table_count'])
+                    if stats.get('json_response_count'):
+                        st.metric("Captured JSON Responses", stats['json_response_count'])
+            if st.session_state.fetch_timing:
+                render_timing_panel(st.session_state.fetch_timing, "fetch")
             with st.expander("🧹 Cleaned HTML Content", expanded=False):
-                st.code(st.session_state.cleaned_html, language="html")
+                render_paged_preview(st.session_state.cleaned_key, "cleaned_html", language="html")
                 st.download_button(
                     label="Download Cleaned HTML",
-                    data=st.session_state.cleaned_html,
+                    data=deferred_payload(st.session_state.cleaned_key),
                     file_name="cleaned_html.html",
                     mime="text/html"
                 )
             with st.expander("📝 Text Content Only", expanded=False):
-                text_content = extract_text_content(st.session_state.cleaned_html)
-                st.text_area("Extracted Text", text_content, height=300, disabled=True)
+                render_paged_preview(st.session_state.text_key, "text_content", label="Extracted Text")
                 st.download_button(
                     label="Download Text Content",
-                    data=text_content,
+                    data=deferred_payload(st.session_state.text_key),
                     file_name="extracted_text.txt",
                     mime="text/plain"
                 )
     with tab2:
         st.title("Data Extractor")
         st.markdown("Extract specific information from the scraped HTML in tabular format using AI.")
-        if not st.session_state.cleaned_html:
+        if not has_payload('cleaned_key'):
             st.warning("⚠️ Please scrape a website first in the 'Scrape Website' tab.")
             st.info("💡 Example queries:\n- Extract all product names and prices\n- Get all table data\n- Extract contact information\n- List all links with their text")
         else:
@@ -169,78 +366,96 @@ def main():
             if extract_button:
                 if not user_query:
                     st.error("Please enter an extraction query")
-                elif not groq_api_key:
+                elif not groq_api_key and not st.session_state.capture_key:
                     st.error("Please configure your Groq API key in the sidebar")
+                elif extract_job and extract_job.active:
+                    st.warning("An extraction is already running for this session. Cancel it first to start another.")
+                else:
+                    extract_job = jobs.submit(
+                        'extract',
+                        jobs.extract,
+                        cleaned_key=st.session_state.cleaned_key,
+                        user_query=user_query,
+                        groq_api_key=groq_api_key,
+                        model_name=model_name,
+                        collect_timing=collect_timing,
+                        capture_key=st.session_state.capture_key
+                    )
+                    track_job('extract_job', extract_job)
+            if extract_job:
+                if extract_job.status == jobs.DONE:
+                    apply_extract_result(extract_job.result)
+                    finish_job('extract_job', extract_job)
+                elif extract_job.status == jobs.FAILED:
+                    st.error(f"❌ Extraction failed: {extract_job.error}")
+                    forget_job('extract_job')
+                elif extract_job.status == jobs.CANCELLED:
+                    st.info("Extraction cancelled.")
+                    forget_job('extract_job')
                 else:
-                    with st.spinner("🤖 AI is analyzing the HTML and extracting data..."):
-                        result = extract_tabular_data(
-                            html_content=st.session_state.cleaned_html,
-                            user_query=user_query,
-                            groq_api_key=groq_api_key,
-                            model_name=model_name
-                        )
-                        st.session_state.extraction_result = result
-            if st.session_state.extraction_result:
-                result = st.session_state.extraction_result
+                    render_job_status(extract_job, 'extract_job')
+            if has_payload('extraction_key'):
+                result = store.get_object(st.session_state.extraction_key)
                 if result['success']:
                     st.divider()
                     st.subheader("📊 Extracted Data")
-                    st.markdown("### 🔢 API Usage (This Response)")
-                    usage = result.get('usage', {})
-                    if usage and usage.get('total_tokens', 0) > 0:
-                        usage_col1, usage_col2, usage_col3, usage_col4 = st.columns(4)
-                        with usage_col1:
-                            st.metric("Total Tokens", f"{usage.get('total_tokens', 0):,}")
-                        with usage_col2:
-                            st.metric("Prompt Tokens", f"{usage.get('prompt_tokens', 0):,}")
-                        with usage_col3:
-                            st.metric("Completion Tokens", f"{usage.get('completion_tokens', 0):,}")
-                        with usage_col4:
-                            tpm_limit = usage.get('tpm_limit', 0)
-                            st.metric("TPM Limit", f"{tpm_limit:,}")
-                        st.caption("💡 TPM = Tokens Per Minute limit for this model (resets every minute on Groq's side)")
-                        if tpm_limit > 0:
-                            pct_used = (usage.get('total_tokens', 0) / tpm_limit) * 100
-                            if pct_used > 80:
-                                st.warning(f"⚠️ This request used {pct_used:.1f}% of your TPM limit. Multiple requests may hit the rate limit.")
-                            elif pct_used > 50:
-                                st.info(f"ℹ️ This request used {pct_used:.1f}% of your TPM limit.")
-                    elif usage and usage.get('error'):
-                        st.warning(f"⚠️ Could not retrieve usage information: {usage.get('error')}")
-                        if st.checkbox("Show debug info", key="show_usage_debug"):
-                            st.json(usage)
+                    if result.get('source') == 'network_capture':
+                        st.success("⚡ Data taken directly from a captured JSON API response. No LLM call or tokens were used.")
                     else:
-                        st.info("📊 Usage information not available for this response.")
-                        st.caption("💡 This may be normal depending on the API response format. The extraction completed successfully.")
-                        if usage and st.checkbox("Show raw usage data", key="show_raw_usage"):
-                            st.json(usage)
+                        st.markdown("### 🔢 API Usage (This Response)")
+                        usage = result.get('usage', {})
+                        if usage and usage.get('total_tokens', 0) > 0:
+                            usage_col1, usage_col2, usage_col3, usage_col4 = st.columns(4)
+                            with usage_col1:
+                                st.metric("Total Tokens", f"{usage.get('total_tokens', 0):,}")
+                            with usage_col2:
+                                st.metric("Prompt Tokens", f"{usage.get('prompt_tokens', 0):,}")
+                            with usage_col3:
+                                st.metric("Completion Tokens", f"{usage.get('completion_tokens', 0):,}")
+                            with usage_col4:
+                                tpm_limit = usage.get('tpm_limit', 0)
+                                st.metric("TPM Limit", f"{tpm_limit:,}")
+                            st.caption("💡 TPM = Tokens Per Minute limit for this model (resets every minute on Groq's side)")
+                            if tpm_limit > 0:
+                                pct_used = (usage.get('total_tokens', 0) / tpm_limit) * 100
+                                if pct_used > 80:
+                                    st.warning(f"⚠️ This request used {pct_used:.1f}% of your TPM limit. Multiple requests may hit the rate limit.")
+                                elif pct_used > 50:
+                                    st.info(f"ℹ️ This request used {pct_used:.1f}% of your TPM limit.")
+                        elif usage and usage.get('error'):
+                            st.warning(f"⚠️ Could not retrieve usage information: {usage.get('error')}")
+                            if st.checkbox("Show debug info", key="show_usage_debug"):
+                                st.json(usage)
+                        else:
+                            st.info("📊 Usage information not available for this response.")
+                            st.caption("💡 This may be normal depending on the API response format. The extraction completed successfully.")
+                            if usage and st.checkbox("Show raw usage data", key="show_raw_usage"):
+                                st.json(usage)
+                    if st.session_state.extract_timing:
+                        render_timing_panel(st.session_state.extract_timing, "extract")
                     if result['description']:
                         st.info(f"ℹ️ {result['description']}")
-                    df = result['dataframe']
-                    if not df.empty:
+                    df = load_dataframe(result['dataframe_key']) if result.get('dataframe_key') in store else None
+                    if df is not None and not df.empty:
                         st.markdown("### Interactive Dataframe")
                         st.dataframe(df, use_container_width=True)
                         st.divider()
                         st.subheader("💾 Download Options")
-                        download_col1, download_col2 = st.columns(2)
-                        with download_col1:
-                            csv = df.to_csv(index=False)
-                            st.download_button(
-                                label="📥 Download CSV",
-                                data=csv,
-                                file_name="extracted_data.csv",
-                                mime="text/csv",
-                                use_container_width=True
-                            )
-                        with download_col2:
-                            json_str = dataframe_to_json(df, orient='records')
-                            st.download_button(
-                                label="📥 Download JSON",
-                                data=json_str,
-                                file_name="extracted_data.json",
-                                mime="application/json",
-                                use_container_width=True
-                            )
+                        exports = result.get('exports', {})
+                        download_cols = st.columns(max(1, len(exports)))
+                        for download_col, (fmt, key) in zip(download_cols, exports.items()):
+                            label, file_name, mime = DOWNLOAD_FORMATS[fmt]
+                            with download_col:
+                                st.download_button(
+                                    label=f"📥 Download {label}",
+                                    data=deferred_payload(key),
+                                    file_name=file_name,
+                                    mime=mime,
+                                    key=f"download_{fmt}",
+                                    use_container_width=True
+                                )
+                        if 'parquet' not in exports:
+                            st.caption("💡 Install `pyarrow` to enable Parquet and Arrow downloads.")
                         with st.expander("📈 Data Statistics"):
                             st.metric("Rows", len(df))
                             st.metric("Columns", len(df.columns))
@@ -250,6 +465,10 @@ def main():
                 else:
                     st.error(f"❌ Extraction failed: {result['error']}")
                     st.info("💡 Tips:\n- Make sure your Groq API key is valid\n- Try rephrasing your query\n- The HTML might not contain the requested information")
+    if any(job is not None and job.active for job in (fetch_job, extract_job)):
+        # Jobs run on the shared pool; rerun periodically so their results land in this session.
+        time.sleep(JOB_POLL_SECONDS)
+        st.rerun()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,204 @@
+"""Offline micro-benchmarks for the CPU-bound pipeline stages.
+
+Usage:
+    python benchmarks/bench_stages.py                       # run and print a table
+    python benchmarks/bench_stages.py --save-baseline       # record benchmarks/baseline.json
+    python benchmarks/bench_stages.py --compare             # exit 1 on regressions
+    python benchmarks/bench_stages.py --sizes 10kb,100kb --stages clean_html,extract
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import extractor
+from cleaner import clean_html, get_html_stats, extract_text_content
+from extractor import smart_content_reduction, repair_llm_json, extract_tabular_data, get_token_limit_for_model
+from fixtures import ensure_fixtures, SIZES, KINDS
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+QUERY = "Extract all product names and prices"
+MODEL = "llama-3.1-8b-instant"
+
+
+def stub_llm_response(rows=200):
+    # Deliberately off-spec (fenced, columns as dict, rows without "data") so the
+    # PydanticOutputParser fails and the repair fallback does the work.
+    body = {
+        "columns": {"Product": "", "Price": "", "Stock": ""},
+        "rows": [{"Product": f"Widget {i}", "Price": f"${i}.99", "Stock": str(i % 50)} for i in range(rows)],
+        "description": "Extracted product information",
+    }
+    return "Here is the data you asked for:\n```json\n" + json.dumps(body, indent=2) + "\n```"
+
+
+class StubResponse:
+    def __init__(self, content):
+        self.content = content
+        self.response_metadata = {'usage': {'prompt_tokens': 2400, 'completion_tokens': 900, 'total_tokens': 3300}}
+
+
+class StubLLM:
+    def __init__(self, content):
+        self.content = content
+
+    def invoke(self, prompt):
+        return StubResponse(self.content)
+
+
+def install_stub_llm(content):
+    real_create_chain = extractor.create_extraction_chain
+
+    def create_stub_chain(groq_api_key, model_name=MODEL):
+        _, parser, prompt_template = real_create_chain(groq_api_key, model_name)
+        return StubLLM(content), parser, prompt_template
+
+    extractor.create_extraction_chain = create_stub_chain
+
+
+def build_cases(html, cleaned, stub_content):
+    max_chars = int(get_token_limit_for_model(MODEL) * 4 * 0.6)
+    return {
+        "clean_html": lambda: clean_html(html, preserve_structure=True),
+        "get_html_stats": lambda: get_html_stats(cleaned),
+        "extract_text_content": lambda: extract_text_content(cleaned),
+        "smart_content_reduction": lambda: smart_content_reduction(cleaned, max_chars, QUERY),
+        "extract": lambda: _check_extract(extract_tabular_data(cleaned, QUERY, "stub-key", MODEL)),
+        "repair_llm_json": lambda: repair_llm_json(stub_content),
+    }
+
+
+def _check_extract(result):
+    if not result['success']:
+        raise RuntimeError(result['error'])
+    return result
+
+
+def measure(func, repeat, budget):
+    timings = []
+    started = time.perf_counter()
+    while len(timings) < repeat:
+        gc.collect()
+        t0 = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - t0)
+        if time.perf_counter() - started > budget:
+            break
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        'runs': len(timings),
+        'min_s': min(timings),
+        'median_s': statistics.median(timings),
+        'peak_mb': peak / (1024 * 1024),
+    }
+
+
+def run(args):
+    fixtures = ensure_fixtures(args.sizes, args.kinds)
+    stub_content = stub_llm_response()
+    install_stub_llm(stub_content)
+    results = {}
+    for fixture_name, path in fixtures.items():
+        with open(path, encoding='utf-8', errors='replace') as f:
+            html = f.read()
+        cleaned = clean_html(html, preserve_structure=True)
+        for stage, func in build_cases(html, cleaned, stub_content).items():
+            if args.stages and stage not in args.stages:
+                continue
+            key = f"{stage}/{fixture_name}"
+            if stage == "repair_llm_json":
+                # Independent of the page, so measure it once.
+                if any(k.startswith("repair_llm_json/") for k in results):
+                    continue
+                key = "repair_llm_json/stub"
+            results[key] = measure(func, args.repeat, args.budget)
+            results[key]['input_bytes'] = len(html)
+            r = results[key]
+            print(f"{key:<45} {r['median_s'] * 1000:>10.2f} ms  {r['peak_mb']:>8.2f} MB  ({r['runs']} runs)", flush=True)
+    return results
+
+
+def compare(results, baseline, threshold, min_delta):
+    regressions = []
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if not previous:
+            continue
+        slower = current['median_s'] - previous['median_s']
+        if slower > min_delta and current['median_s'] > previous['median_s'] * (1 + threshold):
+            regressions.append(f"{key}: time {previous['median_s'] * 1000:.2f} ms -> {current['median_s'] * 1000:.2f} ms")
+        grew = current['peak_mb'] - previous['peak_mb']
+        if grew > 1.0 and current['peak_mb'] > previous['peak_mb'] * (1 + threshold):
+            regressions.append(f"{key}: peak memory {previous['peak_mb']:.2f} MB -> {current['peak_mb']:.2f} MB")
+    return regressions
+
+
+def _csv(value):
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the CPU-bound scraping stages on saved HTML fixtures.")
+    parser.add_argument("--sizes", type=_csv, default=None, help=f"Comma-separated sizes ({', '.join(SIZES)})")
+    parser.add_argument("--kinds", type=_csv, default=None, help=f"Comma-separated fixture kinds ({', '.join(KINDS)})")
+    parser.add_argument("--stages", type=_csv, default=None, help="Comma-separated stages to run")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per case")
+    parser.add_argument("--budget", type=float, default=10.0, help="Stop repeating a case after this many seconds")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline file path")
+    parser.add_argument("--save-baseline", action="store_true", help="Write results to the baseline file")
+    parser.add_argument("--compare", action="store_true", help="Compare against the baseline and fail on regressions")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed relative slowdown/growth (0.25 = 25%%)")
+    parser.add_argument("--min-delta", type=float, default=0.002, help="Ignore slowdowns smaller than this many seconds")
+    parser.add_argument("--json", dest="json_out", help="Also write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = run(args)
+    if args.json_out:
+        with open(args.json_out, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        if not os.path.exists(args.baseline):
+            print(f"No baseline at {args.baseline}; run with --save-baseline first.")
+            return 2
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold, args.min_delta)
+        if regressions:
+            print("\nRegressions:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("\nNo regressions against baseline.")
+    if args.save_baseline:
+        previous = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding='utf-8') as f:
+                previous = json.load(f).get('results', {})
+        previous.update(results)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'saved_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'results': previous,
+            }, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+import os
+import random
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+SIZES = {
+    "10kb": 10 * 1024,
+    "100kb": 100 * 1024,
+    "1mb": 1024 * 1024,
+    "5mb": 5 * 1024 * 1024,
+    "20mb": 20 * 1024 * 1024,
+}
+
+WORDS = (
+    "widget gadget price stock shipping review rating product category brand "
+    "model color size weight available discount offer customer order delivery "
+    "warranty return policy support contact email phone address city country"
+).split()
+
+
+def _sentence(rng, n=12):
+    return ' '.join(rng.choice(WORDS) for _ in range(n)).capitalize() + '.'
+
+
+def _page(title, body, head_extra=""):
+    return (
+        "<!DOCTYPE html><html><head>"
+        f"<meta charset=\"utf-8\"><title>{title}</title>"
+        "<link rel=\"stylesheet\" href=\"/static/site.css\">"
+        "<style>body{font-family:sans-serif}.row{padding:4px}</style>"
+        f"{head_extra}</head><body>{body}</body></html>"
+    )
+
+
+def table_heavy(target_bytes, rng):
+    parts = ["<header><nav><a href=\"/\">Home</a> <a href=\"/shop\">Shop</a></nav></header><main>"]
+    size = 0
+    table_id = 0
+    while size < target_bytes:
+        table_id += 1
+        rows = [f"<table id=\"t{table_id}\" class=\"data\"><thead><tr>"
+                "<th>Product</th><th>Price</th><th>Stock</th><th>Rating</th><th>Notes</th></tr></thead><tbody>"]
+        for i in range(200):
+            if size + sum(len(r) for r in rows) >= target_bytes:
+                break
+            rows.append(
+                f"<tr class=\"row\" onclick=\"select({i})\"><td><a href=\"/p/{table_id}-{i}\">"
+                f"{rng.choice(WORDS).title()} {rng.choice(WORDS).title()} {i}</a></td>"
+                f"<td>${rng.randint(1, 999)}.{rng.randint(0, 99):02d}</td><td>{rng.randint(0, 500)}</td>"
+                f"<td>{rng.randint(1, 5)}/5</td><td>  {_sentence(rng, 6)}  </td></tr>"
+            )
+        rows.append("</tbody></table>")
+        chunk = ''.join(rows)
+        parts.append(chunk)
+        size += len(chunk)
+    parts.append("</main><footer>Contact us</footer>")
+    return _page("Table heavy", ''.join(parts))
+
+
+def spa_dump(target_bytes, rng):
+    # Server-rendered SPA: a small DOM plus huge inline state and bundle scripts.
+    items = []
+    size = 0
+    while size < target_bytes * 0.7:
+        item = (
+            f"{{\"id\":{len(items)},\"name\":\"{rng.choice(WORDS)} {rng.choice(WORDS)}\","
+            f"\"price\":{rng.randint(1, 999)},\"tags\":[\"{rng.choice(WORDS)}\",\"{rng.choice(WORDS)}\"]}}"
+        )
+        items.append(item)
+        size += len(item) + 1
+    state = "<script>window.__INITIAL_STATE__={\"products\":[" + ','.join(items) + "]}</script>"
+    bundle = "<script>" + ("function f(a){return a&&a.map(function(x){return x*2})};" *
+                          max(1, int(target_bytes * 0.2) // 58)) + "</script>"
+    cards = ''.join(
+        f"<div class=\"card\" data-reactid=\"{i}\"><h3>{rng.choice(WORDS).title()}</h3>"
+        f"<span class=\"price\">${rng.randint(1, 999)}</span></div>"
+        for i in range(max(10, target_bytes // 20000))
+    )
+    return _page("SPA dump", f"<div id=\"root\">{cards}</div><noscript>Enable JS</noscript>{bundle}",
+                 head_extra=state)
+
+
+def deeply_nested(target_bytes, rng, depth=120):
+    parts = []
+    size = 0
+    while size < target_bytes:
+        opening = ''.join(f"<div class=\"l{d}\"><span>{rng.choice(WORDS)}</span>" for d in range(depth))
+        chunk = opening + f"<p>{_sentence(rng)}</p>" + "</div>" * depth
+        parts.append(chunk)
+        size += len(chunk)
+    return _page("Deeply nested", ''.join(parts))
+
+
+def article(target_bytes, rng):
+    parts = ["<main><article><h1>Catalogue notes</h1>"]
+    size = 0
+    while size < target_bytes:
+        chunk = (
+            f"<!-- section {size} --><h2>{_sentence(rng, 4)}</h2>"
+            f"<p>{_sentence(rng, 40)}\n   {_sentence(rng, 30)}</p>"
+            f"<ul><li>{_sentence(rng, 5)}</li><li>{_sentence(rng, 5)}</li></ul>"
+        )
+        parts.append(chunk)
+        size += len(chunk)
+    parts.append("</article></main>")
+    return _page("Article", ''.join(parts))
+
+
+KINDS = {
+    "table": table_heavy,
+    "spa": spa_dump,
+    "nested": deeply_nested,
+    "article": article,
+}
+
+
+def ensure_fixtures(sizes=None, kinds=None, seed=1234):
+    """Write the synthetic fixture corpus to FIXTURE_DIR (once) and return {name: path}.
+
+    Any other *.html file saved in FIXTURE_DIR is included as-is, so real captured pages
+    can be added to the corpus next to the generated ones.
+    """
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    sizes = sizes or list(SIZES)
+    kinds = kinds or list(KINDS)
+    fixtures = {}
+    for kind in kinds:
+        for size_name in sizes:
+            name = f"{kind}_{size_name}"
+            path = os.path.join(FIXTURE_DIR, name + ".html")
+            if not os.path.exists(path):
+                rng = random.Random(f"{seed}-{name}")
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write(KINDS[kind](SIZES[size_name], rng))
+            fixtures[name] = path
+    for filename in sorted(os.listdir(FIXTURE_DIR)):
+        name, ext = os.path.splitext(filename)
+        if ext == ".html" and name not in fixtures and not _is_generated(name):
+            fixtures[name] = os.path.join(FIXTURE_DIR, filename)
+    return fixtures
+
+
+def _is_generated(name):
+    kind, _, size_name = name.partition('_')
+    return kind in KINDS and size_name in SIZES
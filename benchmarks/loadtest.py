@@ -0,0 +1,156 @@
+"""End-to-end load test against the local stand-in site and mock LLM API.
+
+Usage:
+    python benchmarks/loadtest.py --mode pipeline --pages 40 --concurrency 4
+    python benchmarks/loadtest.py --mode extract --pages 200 --concurrency 16 --llm-rpm 30
+    python benchmarks/loadtest.py --mode scrape --page-kind spa --page-latency-ms 300
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from cleaner import clean_html
+from extractor import extract_tabular_data
+from scraper import fetch_html_with_info
+from stand_in import StandInServer, _static_page
+
+MODES = ("scrape", "extract", "pipeline")
+QUERY = "Extract all product names, prices and stock"
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def run_task(mode, url, page_html, model_name):
+    started = time.perf_counter()
+    stage_times = {}
+    html = page_html
+    if mode in ("scrape", "pipeline"):
+        t0 = time.perf_counter()
+        html = fetch_html_with_info(url, timeout=30, headless=True)['html']
+        stage_times['fetch'] = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    cleaned = clean_html(html, preserve_structure=True)
+    stage_times['clean'] = time.perf_counter() - t0
+    if mode in ("extract", "pipeline"):
+        t0 = time.perf_counter()
+        result = extract_tabular_data(cleaned, QUERY, os.environ.get("GROQ_API_KEY", "mock-key"), model_name)
+        stage_times['extract'] = time.perf_counter() - t0
+        if not result['success']:
+            raise RuntimeError(result['error'])
+    return time.perf_counter() - started, stage_times
+
+
+def classify_error(error):
+    text = str(error)
+    if '429' in text or 'rate limit' in text.lower():
+        return 'rate_limited'
+    if 'timeout' in text.lower() or 'timed out' in text.lower():
+        return 'timeout'
+    return type(error).__name__
+
+
+def run_load(args, stand_in):
+    urls = [f"{stand_in.base_url}/{args.page_kind}/{i}" for i in range(args.pages)]
+    page_html = _static_page(0, args.rows)
+    latencies = []
+    stage_totals = Counter()
+    errors = Counter()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        futures = [pool.submit(run_task, args.mode, url, page_html, args.model) for url in urls]
+        for done, future in enumerate(as_completed(futures), 1):
+            try:
+                latency, stage_times = future.result()
+                latencies.append(latency)
+                stage_totals.update(stage_times)
+            except Exception as e:
+                errors[classify_error(e)] += 1
+            if args.progress and done % max(1, args.pages // 10) == 0:
+                print(f"  {done}/{args.pages} done", flush=True)
+    elapsed = time.perf_counter() - started
+    completed = len(latencies)
+    return {
+        'mode': args.mode,
+        'page_kind': args.page_kind,
+        'pages': args.pages,
+        'concurrency': args.concurrency,
+        'elapsed_s': round(elapsed, 3),
+        'completed': completed,
+        'failed': sum(errors.values()),
+        'error_rate': round(sum(errors.values()) / args.pages, 4) if args.pages else 0.0,
+        'errors': dict(errors),
+        'pages_per_min': round(completed / elapsed * 60, 2) if elapsed else 0.0,
+        'latency_s': {
+            'p50': round(percentile(latencies, 50), 4),
+            'p95': round(percentile(latencies, 95), 4),
+            'p99': round(percentile(latencies, 99), 4),
+            'max': round(max(latencies), 4) if latencies else 0.0,
+        },
+        'mean_stage_s': {stage: round(total / completed, 4) for stage, total in stage_totals.items()} if completed else {},
+        'server': dict(stand_in.stats),
+    }
+
+
+def print_report(report):
+    print(f"\nMode: {report['mode']} ({report['page_kind']} pages), concurrency {report['concurrency']}")
+    print(f"Completed {report['completed']}/{report['pages']} in {report['elapsed_s']:.1f} s "
+          f"-> {report['pages_per_min']:.1f} pages/min")
+    latency = report['latency_s']
+    print(f"Latency p50 {latency['p50']:.3f} s | p95 {latency['p95']:.3f} s | p99 {latency['p99']:.3f} s | max {latency['max']:.3f} s")
+    if report['mean_stage_s']:
+        print("Mean stage time: " + ', '.join(f"{k} {v:.3f} s" for k, v in report['mean_stage_s'].items()))
+    print(f"Error rate {report['error_rate'] * 100:.1f}% {report['errors'] or ''}")
+    server = report['server']
+    print(f"Server: {server['page_requests']} page requests, {server['llm_requests']} LLM requests, "
+          f"{server['llm_429']} answered with 429")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the scraper and extractor against local stand-ins.")
+    parser.add_argument("--mode", choices=MODES, default="pipeline")
+    parser.add_argument("--page-kind", choices=("static", "spa"), default="static")
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rows", type=int, default=50, help="Rows per synthetic page")
+    parser.add_argument("--page-latency-ms", type=float, default=100)
+    parser.add_argument("--page-jitter-ms", type=float, default=50)
+    parser.add_argument("--llm-latency-ms", type=float, default=800)
+    parser.add_argument("--llm-jitter-ms", type=float, default=400)
+    parser.add_argument("--llm-rpm", type=int, default=0, help="Mock requests-per-minute limit (0 = unlimited)")
+    parser.add_argument("--llm-429-rate", type=float, default=0.0, help="Fraction of LLM calls answered with 429")
+    parser.add_argument("--model", default="llama-3.1-8b-instant")
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--json", dest="json_out", help="Also write the report to this JSON file")
+    parser.add_argument("--progress", action="store_true")
+    args = parser.parse_args(argv)
+
+    with StandInServer(port=args.port, page_latency_ms=args.page_latency_ms, page_jitter_ms=args.page_jitter_ms,
+                       rows=args.rows, llm_latency_ms=args.llm_latency_ms, llm_jitter_ms=args.llm_jitter_ms,
+                       llm_rpm=args.llm_rpm, llm_429_rate=args.llm_429_rate) as stand_in:
+        # ChatGroq and the groq SDK read their base URL from the environment, so calls hit the mock.
+        os.environ["GROQ_API_BASE"] = stand_in.base_url
+        os.environ["GROQ_BASE_URL"] = stand_in.base_url
+        report = run_load(args, stand_in)
+    print_report(report)
+    if args.json_out:
+        with open(args.json_out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return 0 if report['completed'] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,214 @@
+"""Local stand-in site and mock Groq/OpenAI-compatible chat endpoint for offline load tests.
+
+Site routes (latency via the server setting or a ?latency_ms= query parameter):
+    /static/<n>        server-rendered product table
+    /spa/<n>           empty shell that renders the same table from /api/items/<n> with JS
+    /api/items/<n>     JSON rows behind the SPA page
+
+Mock LLM route:
+    POST .../chat/completions   canned ExtractedTable JSON with usage, latency and 429s
+"""
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+def _items(page, rows):
+    rng = random.Random(page)
+    return [
+        {"product": f"Widget {page}-{i}", "price": f"${rng.randint(1, 999)}.{rng.randint(0, 99):02d}",
+         "stock": rng.randint(0, 500)}
+        for i in range(rows)
+    ]
+
+
+def _static_page(page, rows):
+    body = ''.join(
+        f"<tr><td>{item['product']}</td><td>{item['price']}</td><td>{item['stock']}</td></tr>"
+        for item in _items(page, rows)
+    )
+    return (
+        f"<!DOCTYPE html><html><head><title>Static page {page}</title></head><body><main>"
+        f"<h1>Products {page}</h1><table><thead><tr><th>Product</th><th>Price</th><th>Stock</th></tr></thead>"
+        f"<tbody>{body}</tbody></table></main></body></html>"
+    )
+
+
+def _spa_page(page):
+    return (
+        f"<!DOCTYPE html><html><head><title>SPA page {page}</title></head><body>"
+        "<div id=\"root\">Loading...</div><script>"
+        f"fetch('/api/items/{page}').then(r => r.json()).then(data => {{"
+        "const rows = data.items.map(i => `<tr><td>${i.product}</td><td>${i.price}</td><td>${i.stock}</td></tr>`).join('');"
+        "document.getElementById('root').innerHTML = `<main><table><thead><tr><th>Product</th><th>Price</th>"
+        "<th>Stock</th></tr></thead><tbody>${rows}</tbody></table></main>`;"
+        "});</script></body></html>"
+    )
+
+
+def canned_completion(rows, model):
+    content = json.dumps({
+        "columns": ["Product", "Price", "Stock"],
+        "rows": [{"data": {"Product": item["product"], "Price": item["price"], "Stock": str(item["stock"])}}
+                 for item in _items(0, rows)],
+        "description": "Extracted product information",
+    })
+    prompt_tokens = 2400
+    completion_tokens = max(1, len(content) // 4)
+    return {
+        "id": f"chatcmpl-mock-{random.getrandbits(32):08x}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+
+class StandInServer:
+    """Threaded HTTP server hosting both the synthetic site and the mock LLM API."""
+
+    def __init__(self, host="127.0.0.1", port=0, page_latency_ms=0, page_jitter_ms=0, rows=50,
+                 llm_latency_ms=800, llm_jitter_ms=300, llm_rpm=0, llm_429_rate=0.0, llm_rows=20):
+        self.page_latency_ms = page_latency_ms
+        self.page_jitter_ms = page_jitter_ms
+        self.rows = rows
+        self.llm_latency_ms = llm_latency_ms
+        self.llm_jitter_ms = llm_jitter_ms
+        self.llm_rpm = llm_rpm
+        self.llm_429_rate = llm_429_rate
+        self.llm_rows = llm_rows
+        self.stats = {'page_requests': 0, 'llm_requests': 0, 'llm_429': 0}
+        self._lock = threading.Lock()
+        self._llm_calls = []
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _rate_limited(self):
+        if self.llm_429_rate and random.random() < self.llm_429_rate:
+            return True
+        if not self.llm_rpm:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            self._llm_calls = [t for t in self._llm_calls if now - t < 60]
+            if len(self._llm_calls) >= self.llm_rpm:
+                return True
+            self._llm_calls.append(now)
+        return False
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status, body, content_type, headers=None):
+                payload = body.encode('utf-8')
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(payload)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _sleep(self, base_ms, jitter_ms, query):
+                delay = float(query.get('latency_ms', [base_ms])[0])
+                if jitter_ms:
+                    delay += random.uniform(0, jitter_ms)
+                if delay > 0:
+                    time.sleep(delay / 1000)
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                query = parse_qs(parsed.query)
+                parts = [p for p in parsed.path.split('/') if p]
+                page = int(parts[-1]) if parts and parts[-1].isdigit() else 0
+                server._count('page_requests')
+                self._sleep(server.page_latency_ms, server.page_jitter_ms, query)
+                if parts[:1] == ['static']:
+                    self._send(200, _static_page(page, server.rows), "text/html; charset=utf-8")
+                elif parts[:1] == ['spa']:
+                    self._send(200, _spa_page(page), "text/html; charset=utf-8")
+                elif parts[:2] == ['api', 'items']:
+                    self._send(200, json.dumps({"page": page, "items": _items(page, server.rows)}),
+                               "application/json")
+                else:
+                    self._send(404, "Not found", "text/plain")
+
+            def do_POST(self):
+                parsed = urlparse(self.path)
+                length = int(self.headers.get('Content-Length', 0))
+                request = json.loads(self.rfile.read(length) or b'{}')
+                if not parsed.path.endswith('/chat/completions'):
+                    self._send(404, json.dumps({"error": {"message": "Not found"}}), "application/json")
+                    return
+                server._count('llm_requests')
+                if server._rate_limited():
+                    server._count('llm_429')
+                    self._send(429, json.dumps({"error": {
+                        "message": "Rate limit reached for model. Please try again in 1s.",
+                        "type": "tokens", "code": "rate_limit_exceeded"}}),
+                        "application/json", {"retry-after": "1"})
+                    return
+                self._sleep(server.llm_latency_ms, server.llm_jitter_ms, parse_qs(parsed.query))
+                self._send(200, json.dumps(canned_completion(server.llm_rows, request.get('model', 'mock'))),
+                           "application/json")
+
+        return Handler
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Serve the stand-in site and mock LLM API.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--page-latency-ms", type=float, default=0)
+    parser.add_argument("--llm-latency-ms", type=float, default=800)
+    parser.add_argument("--llm-rpm", type=int, default=0)
+    args = parser.parse_args()
+    with StandInServer(port=args.port, page_latency_ms=args.page_latency_ms,
+                       llm_latency_ms=args.llm_latency_ms, llm_rpm=args.llm_rpm) as stand_in:
+        print(f"Serving on {stand_in.base_url} (Ctrl+C to stop)")
+        print(f"  export GROQ_API_BASE={stand_in.base_url}")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,186 @@
+"""Cold-start profile for the Streamlit app.
+
+Runs the app's first script run in fresh interpreters under `python -X importtime`, next to
+an empty control script, and reports first-run time and import time per module that the app
+adds on top of Streamlit itself.
+
+Usage:
+    python benchmarks/startup.py                      # report
+    python benchmarks/startup.py --save-baseline      # record benchmarks/startup_baseline.json
+    python benchmarks/startup.py --compare            # exit 1 on regressions or heavy imports at first paint
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "app.py")
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "startup_baseline.json")
+
+# Should only be imported once the stage that needs them runs, never at first paint.
+HEAVY_MODULES = (
+    "selenium", "webdriver_manager", "langchain", "langchain_core", "langchain_groq", "groq",
+    "pydantic", "pandas", "pyarrow", "bs4", "lxml",
+)
+
+START_MARKER = "@@first-run-start"
+END_MARKER = "@@first-run-end"
+
+CHILD = r"""
+import json, sys, time
+sys.path.insert(0, {root!r})
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({script!r}, default_timeout=120)
+before = set(sys.modules)
+sys.stderr.write({start!r} + "\n"); sys.stderr.flush()
+t0 = time.perf_counter()
+at.run()
+elapsed = time.perf_counter() - t0
+sys.stderr.write({end!r} + "\n"); sys.stderr.flush()
+print(json.dumps({{
+    'first_run_s': elapsed,
+    'exceptions': [str(e.value) for e in at.exception],
+    'new_modules': sorted(set(sys.modules) - before),
+}}))
+"""
+
+
+def parse_importtime(stderr):
+    """Sum cumulative import time (ms) per top-level package for imports made during the run."""
+    per_package = defaultdict(float)
+    inside = False
+    for line in stderr.splitlines():
+        if line.startswith(START_MARKER):
+            inside = True
+            continue
+        if line.startswith(END_MARKER):
+            break
+        if not inside or not line.startswith("import time:") or "cumulative" in line:
+            continue
+        try:
+            _, cumulative, name = line[len("import time:"):].split("|", 2)
+        except ValueError:
+            continue
+        if name.startswith("  "):
+            continue  # Nested import; already counted in its parent's cumulative time
+        per_package[name.strip().split(".")[0]] += int(cumulative) / 1000
+    return dict(per_package)
+
+
+def profile_once(script):
+    child = CHILD.format(root=ROOT, script=script, start=START_MARKER, end=END_MARKER)
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="0")
+    t0 = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", child], cwd=ROOT,
+                          capture_output=True, text=True, env=env)
+    wall = time.perf_counter() - t0
+    if proc.returncode != 0:
+        raise RuntimeError(f"Profiling {script} failed:\n{proc.stderr[-2000:]}")
+    report = json.loads(proc.stdout.strip().splitlines()[-1])
+    report['process_s'] = wall
+    report['imports_ms'] = parse_importtime(proc.stderr)
+    return report
+
+
+def profile(runs):
+    with tempfile.NamedTemporaryFile("w", suffix=".py", delete=False) as control_file:
+        control_file.write("import streamlit as st\nst.title('control')\n")
+    try:
+        control = [profile_once(control_file.name) for _ in range(runs)]
+        app = [profile_once(APP) for _ in range(runs)]
+    finally:
+        os.remove(control_file.name)
+    control_modules = set().union(*(set(r['new_modules']) for r in control))
+    app_modules = set(app[0]['new_modules'])
+    added_roots = sorted({m.split('.')[0] for m in app_modules - control_modules})
+    imports = defaultdict(list)
+    for report in app:
+        for package, ms in report['imports_ms'].items():
+            imports[package].append(ms)
+    control_imports = {p for r in control for p in r['imports_ms']}
+    return {
+        'runs': runs,
+        'first_run_s': statistics.median(r['first_run_s'] for r in app),
+        'control_first_run_s': statistics.median(r['first_run_s'] for r in control),
+        'process_s': statistics.median(r['process_s'] for r in app),
+        'imports_ms': {p: round(statistics.median(v), 2) for p, v in sorted(
+            imports.items(), key=lambda kv: -statistics.median(kv[1])) if p not in control_imports},
+        'added_packages': added_roots,
+        'heavy_at_first_paint': [m for m in HEAVY_MODULES if m in added_roots],
+        'exceptions': app[0]['exceptions'],
+    }
+
+
+def print_report(report, top):
+    print(f"First script run: {report['first_run_s'] * 1000:.0f} ms "
+          f"(empty Streamlit control: {report['control_first_run_s'] * 1000:.0f} ms, "
+          f"whole process: {report['process_s'] * 1000:.0f} ms, median of {report['runs']})")
+    if report['exceptions']:
+        print(f"App raised during first run: {report['exceptions']}")
+    print("\nImport time added by the app (cumulative, top-level packages):")
+    for package, ms in list(report['imports_ms'].items())[:top]:
+        print(f"  {package:<30} {ms:>9.1f} ms")
+    heavy = report['heavy_at_first_paint']
+    print("\nHeavy dependencies imported before first paint: " + (', '.join(heavy) if heavy else "none"))
+
+
+def compare(report, baseline, threshold, min_delta):
+    problems = []
+    slower = report['first_run_s'] - baseline['first_run_s']
+    if slower > min_delta and report['first_run_s'] > baseline['first_run_s'] * (1 + threshold):
+        problems.append(f"first run {baseline['first_run_s'] * 1000:.0f} ms -> {report['first_run_s'] * 1000:.0f} ms")
+    newly_heavy = sorted(set(report['heavy_at_first_paint']) - set(baseline['heavy_at_first_paint']))
+    if newly_heavy:
+        problems.append(f"now imported at first paint: {', '.join(newly_heavy)}")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profile cold start and per-module import time of the app.")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters per measurement")
+    parser.add_argument("--top", type=int, default=20, help="How many packages to list")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed relative slowdown (0.25 = 25%%)")
+    parser.add_argument("--min-delta", type=float, default=0.05, help="Ignore slowdowns smaller than this many seconds")
+    parser.add_argument("--json", dest="json_out", help="Also write the report to this JSON file")
+    args = parser.parse_args(argv)
+
+    report = profile(args.runs)
+    print_report(report, args.top)
+    if args.json_out:
+        with open(args.json_out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    status = 0
+    if args.compare:
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding='utf-8') as f:
+                baseline = json.load(f)
+        else:
+            # Without a baseline only the "no heavy imports at first paint" rule is enforced.
+            print(f"\nNo baseline at {args.baseline}; checking heavy imports only.")
+            baseline = {'first_run_s': float('inf'), 'heavy_at_first_paint': []}
+        problems = compare(report, baseline, args.threshold, args.min_delta)
+        if problems:
+            print("\nRegressions:")
+            for line in problems:
+                print(f"  {line}")
+            status = 1
+        else:
+            print("\nNo startup regressions against baseline.")
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
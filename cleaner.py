@@ -1,8 +1,10 @@
 from bs4 import BeautifulSoup, Comment
 from bs4.element import NavigableString
 import re
+import metrics
 
 
+@metrics.timed("clean_html")
 def clean_html(html: str, preserve_structure: bool = True) -> str:
     if not html:
         return ""
@@ -36,6 +38,7 @@ def clean_html(html: str, preserve_structure: bool = True) -> str:
     return str(soup)
 
 
+@metrics.timed("get_html_stats")
 def get_html_stats(html: str) -> dict:
     if not html:
         return {
@@ -61,6 +64,7 @@ def get_html_stats(html: str) -> dict:
     }
 
 
+@metrics.timed("extract_text_content")
 def extract_text_content(html: str) -> str:
     if not html:
         return ""
@@ -0,0 +1,351 @@
+"""Batch crawl/extract over a durable work queue.
+
+Every URL moves through fetched -> cleaned -> extracted, and each stage's output is
+checkpointed to the artifacts directory before the queue records it, so a restarted
+worker picks up from the last finished stage instead of refetching or re-extracting.
+Several worker processes (or hosts sharing the queue) can run at once; each holds a
+heartbeated lease on the item it is working on.
+
+Usage:
+    python crawl.py enqueue urls.txt --query "product names and prices"
+    python crawl.py work --processes 4
+    python crawl.py status
+    python crawl.py retry-failed
+    python crawl.py export results.parquet
+"""
+import argparse
+import functools
+import gzip
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from dotenv import load_dotenv
+
+from workqueue import (
+    CLEANED, DEFAULT_LEASE_SECONDS, DEFAULT_MAX_ATTEMPTS, DEFAULT_RETRY_BACKOFF, EXTRACTED,
+    FAILED, FETCHED, PENDING, LeaseLost, SQLiteWorkQueue, WorkItem, WorkQueue, make_worker_id,
+)
+
+load_dotenv()
+
+DEFAULT_DB = os.getenv("CRAWL_DB", "crawl.db")
+DEFAULT_ARTIFACTS = os.getenv("CRAWL_ARTIFACTS", "crawl_artifacts")
+DEFAULT_MODEL = "llama-3.1-8b-instant"
+
+
+class ArtifactDir:
+    """Per-item stage outputs on local disk, addressed by paths relative to the root."""
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    def write_text(self, item_id: int, name: str, text: str, compress: bool = True) -> str:
+        rel = os.path.join(str(item_id), name + ('.gz' if compress else ''))
+        path = self.path(rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        opener = gzip.open if compress else open
+        with opener(tmp, 'wt', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp, path)  # Never leave a half-written checkpoint behind
+        return rel
+
+    def read_text(self, rel: str) -> str:
+        opener = gzip.open if rel.endswith('.gz') else open
+        with opener(self.path(rel), 'rt', encoding='utf-8') as f:
+            return f.read()
+
+    def exists(self, rel: Optional[str]) -> bool:
+        return bool(rel) and os.path.exists(self.path(rel))
+
+
+class Heartbeat:
+    """Extends the item's lease in the background; flags `lost` if another worker took it over."""
+
+    def __init__(self, open_queue: Callable[[], WorkQueue], item_id: int, worker_id: str, interval: float):
+        self.lost = threading.Event()
+        self._stop = threading.Event()
+        self._args = (open_queue, item_id, worker_id, interval)
+        self._thread = threading.Thread(target=self._beat, daemon=True)
+
+    def _beat(self):
+        open_queue, item_id, worker_id, interval = self._args
+        queue = open_queue()  # Own connection; the worker thread keeps using its queue
+        try:
+            while not self._stop.wait(interval):
+                if not queue.heartbeat(item_id, worker_id):
+                    self.lost.set()
+                    return
+        finally:
+            queue.close()
+
+    def check(self):
+        if self.lost.is_set():
+            raise LeaseLost("Lease was lost while working on this item")
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+
+def process_item(item: WorkItem, queue: WorkQueue, worker_id: str, artifacts: ArtifactDir,
+                 heartbeat: Heartbeat, groq_api_key: str, model_name: str, capture_network: bool):
+    """Run the remaining stages for one item, checkpointing after each."""
+    state = item.state
+    saved = dict(item.artifacts)
+    # A checkpoint recorded in the queue but missing on disk means that stage has to be redone.
+    if state in (FETCHED, CLEANED) and not artifacts.exists(saved.get('raw')):
+        state = PENDING
+    if state == CLEANED and not artifacts.exists(saved.get('cleaned')):
+        state = FETCHED
+
+    if state == PENDING:
+        from scraper import fetch_html_with_info
+        page_info = fetch_html_with_info(item.url, headless=True, capture_network=capture_network)
+        heartbeat.check()
+        saved = {'raw': artifacts.write_text(item.id, 'raw.html', page_info['html']), 'title': page_info['title']}
+        if page_info.get('json_responses'):
+            saved['capture'] = artifacts.write_text(item.id, 'capture.json', json.dumps(page_info['json_responses']))
+        queue.advance(item.id, worker_id, FETCHED, saved)
+        state = FETCHED
+
+    if state == FETCHED:
+        if saved.get('capture') and artifacts.exists(saved['capture']):
+            from api_capture import extract_from_json_responses
+            result = extract_from_json_responses(json.loads(artifacts.read_text(saved['capture'])), item.query)
+            if result is not None:
+                heartbeat.check()
+                queue.complete(item.id, worker_id, _save_result(item, artifacts, result))
+                return
+        from cleaner import clean_html
+        cleaned_html = clean_html(artifacts.read_text(saved['raw']), preserve_structure=True)
+        heartbeat.check()
+        saved['cleaned'] = artifacts.write_text(item.id, 'cleaned.html', cleaned_html)
+        queue.advance(item.id, worker_id, CLEANED, saved)
+
+    from extractor import extract_tabular_data
+    result = extract_tabular_data(
+        html_content=artifacts.read_text(saved['cleaned']),
+        user_query=item.query,
+        groq_api_key=groq_api_key,
+        model_name=model_name,
+    )
+    if not result['success']:
+        raise RuntimeError(result['error'] or "Extraction failed")
+    heartbeat.check()
+    queue.complete(item.id, worker_id, _save_result(item, artifacts, result))
+
+
+def _save_result(item: WorkItem, artifacts: ArtifactDir, result: Dict[str, Any]) -> Dict[str, str]:
+    # Rows are checkpointed exactly as extracted; column types are only applied at export.
+    df = result['dataframe']
+    rows = df.to_json(orient='records', lines=True, force_ascii=False) if df is not None and not df.empty else ''
+    return {
+        'result': artifacts.write_text(item.id, 'result.jsonl', rows, compress=False),
+        'source': result.get('source', 'llm'),
+        'description': result.get('description', ''),
+    }
+
+
+def queue_factory(db: str, **options) -> Callable[[], WorkQueue]:
+    """Picklable factory for the queue backend, so worker processes and heartbeat threads can
+    each open their own connection. Swap this to run workers against another WorkQueue."""
+    return functools.partial(SQLiteWorkQueue, db, **options)
+
+
+def run_worker(open_queue: Callable[[], WorkQueue], artifacts_root: str, heartbeat_interval: float,
+               model_name: str, capture_network: bool, idle_exit: bool, poll_seconds: float = 2.0) -> int:
+    worker_id = make_worker_id()
+    artifacts = ArtifactDir(artifacts_root)
+    groq_api_key = os.getenv("GROQ_API_KEY", "")
+    done = 0
+    with open_queue() as queue:
+        while True:
+            item = queue.claim(worker_id)
+            if item is None:
+                if idle_exit and not queue.unfinished():
+                    return done
+                time.sleep(poll_seconds)
+                continue
+            print(f"[{worker_id}] {item.url} (from {item.state}, attempt {item.attempts + 1})", flush=True)
+            try:
+                with Heartbeat(open_queue, item.id, worker_id, heartbeat_interval) as heartbeat:
+                    process_item(item, queue, worker_id, artifacts, heartbeat, groq_api_key,
+                                 model_name, capture_network)
+                done += 1
+            except LeaseLost as e:
+                print(f"[{worker_id}] {item.url}: {e}", flush=True)
+            except KeyboardInterrupt:
+                queue.release(item.id, worker_id)
+                raise
+            except Exception as e:
+                try:
+                    state = queue.fail(item.id, worker_id, f"{type(e).__name__}: {e}")
+                except LeaseLost:
+                    continue
+                print(f"[{worker_id}] {item.url}: {e} -> {'dead-lettered' if state == FAILED else 'will retry'}",
+                      flush=True)
+
+
+def _worker_entry(kwargs):
+    try:
+        return run_worker(**kwargs)
+    except KeyboardInterrupt:
+        return 0
+
+
+def cmd_enqueue(args):
+    if args.file == '-':
+        urls = sys.stdin.read().splitlines()
+    else:
+        with open(args.file, encoding='utf-8') as f:
+            urls = f.read().splitlines()
+    urls = [u for u in urls if u.strip() and not u.lstrip().startswith('#')]
+    with queue_factory(args.db)() as queue:
+        added = queue.enqueue(urls, args.query, args.priority)
+    print(f"Queued {added} new URL(s) ({len(urls) - added} already present)")
+
+
+def cmd_work(args):
+    open_queue = queue_factory(args.db, lease_seconds=args.lease, max_attempts=args.max_attempts,
+                               retry_backoff=args.retry_backoff)
+    kwargs = dict(
+        open_queue=open_queue, artifacts_root=args.artifacts, heartbeat_interval=max(1.0, args.lease / 3),
+        model_name=args.model, capture_network=args.capture_network, idle_exit=not args.forever,
+    )
+    with open_queue() as queue:
+        extracted_before = queue.stats()[EXTRACTED]
+    if args.processes <= 1:
+        _worker_entry(kwargs)
+    else:
+        # Independent processes rather than a Pool: if one dies (Chrome OOM, SIGKILL) the
+        # others keep draining the queue and re-claim its item once the lease expires.
+        workers = [multiprocessing.Process(target=_worker_entry, args=(kwargs,))
+                   for _ in range(args.processes)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        crashed = [worker.exitcode for worker in workers if worker.exitcode != 0]
+        if crashed:
+            print(f"{len(crashed)} worker process(es) exited abnormally (exit codes {crashed}); "
+                  f"their items are retried when the leases expire")
+    with open_queue() as queue:
+        print(f"Extracted {queue.stats()[EXTRACTED] - extracted_before} URL(s)")
+    cmd_status(args)
+
+
+def cmd_status(args):
+    with queue_factory(args.db)() as queue:
+        stats = queue.stats()
+        print("  ".join(f"{name}: {stats[name]}" for name in (PENDING, FETCHED, CLEANED, EXTRACTED, FAILED, 'leased')))
+        if args.verbose:
+            for item in queue.items(FAILED):
+                print(f"  dead: {item.url} after {item.attempts} attempt(s): {item.last_error}")
+
+
+def cmd_retry_failed(args):
+    with queue_factory(args.db)() as queue:
+        print(f"Requeued {queue.requeue_failed()} dead-lettered URL(s)")
+
+
+def _result_frames(queue: WorkQueue, artifacts: ArtifactDir):
+    import pandas as pd
+    for item in queue.items(EXTRACTED):
+        rel = item.artifacts.get('result')
+        if not artifacts.exists(rel) or os.path.getsize(artifacts.path(rel)) == 0:
+            continue
+        df = pd.read_json(artifacts.path(rel), lines=True, dtype=False, convert_dates=False)
+        df.insert(0, 'source_url', item.url)
+        yield df
+
+
+def cmd_export(args):
+    from exporter import FORMATS, ExportWriter, infer_schema, merge_schema
+    extension = os.path.splitext(args.output)[1].lower()
+    fmt = args.format or next((name for name, (ext, _) in FORMATS.items() if ext == extension), None)
+    if fmt is None:
+        print(f"Can't tell the export format from '{args.output}'. Use a {', '.join(ext for ext, _ in FORMATS.values())} "
+              f"file name or pass --format.", file=sys.stderr)
+        return 2
+    artifacts = ArtifactDir(args.artifacts)
+    with queue_factory(args.db)() as queue:
+        # First pass settles one schema covering every page, so later pages can't lose
+        # columns or values to types fixed by the first one.
+        schema = None
+        for df in _result_frames(queue, artifacts):
+            schema = merge_schema(schema, infer_schema(df, args.infer_types))
+        if schema is None:
+            print("No extracted rows to export; nothing was written.", file=sys.stderr)
+            return 1
+        with ExportWriter(args.output, fmt, schema=schema, infer_types=args.infer_types) as writer:
+            for df in _result_frames(queue, artifacts):
+                writer.write(df)
+    print(f"Wrote {writer.rows_written} row(s) from {writer.pages_written} page(s) to {args.output}")
+    if writer.coerced_values:
+        lost = ', '.join(f"{name} ({count})" for name, count in writer.coerced_columns.items())
+        print(f"Values that didn't fit their column type were written as nulls: {lost}")
+    if writer.dropped_columns:
+        print(f"Columns not in the schema were dropped: {', '.join(writer.dropped_columns)}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Durable multi-worker crawl and extraction queue.")
+    parser.add_argument("--db", default=DEFAULT_DB, help="Queue database (SQLite file)")
+    parser.add_argument("--artifacts", default=DEFAULT_ARTIFACTS, help="Directory for stage checkpoints")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("enqueue", help="Add URLs (one per line) to the queue")
+    p.add_argument("file", help="File with URLs, or - for stdin")
+    p.add_argument("--query", required=True, help="What to extract from each page")
+    p.add_argument("--priority", type=int, default=0)
+    p.set_defaults(func=cmd_enqueue)
+
+    p = sub.add_parser("work", help="Process queued URLs until the queue is drained")
+    p.add_argument("--processes", type=int, default=1)
+    p.add_argument("--lease", type=int, default=DEFAULT_LEASE_SECONDS, help="Lease length in seconds")
+    p.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS)
+    p.add_argument("--retry-backoff", type=int, default=DEFAULT_RETRY_BACKOFF,
+                   help="Seconds before the first retry; doubles on each further attempt")
+    p.add_argument("--model", default=DEFAULT_MODEL)
+    p.add_argument("--capture-network", action="store_true",
+                   help="Try the page's JSON API responses before calling the LLM")
+    p.add_argument("--forever", action="store_true", help="Keep polling for new work instead of exiting when idle")
+    p.add_argument("-v", "--verbose", action="store_true")
+    p.set_defaults(func=cmd_work)
+
+    p = sub.add_parser("status", help="Show how many URLs are in each state")
+    p.add_argument("-v", "--verbose", action="store_true", help="List dead-lettered URLs and their errors")
+    p.set_defaults(func=cmd_status)
+
+    p = sub.add_parser("retry-failed", help="Requeue dead-lettered URLs from their last checkpoint")
+    p.set_defaults(func=cmd_retry_failed)
+
+    p = sub.add_parser("export", help="Merge extracted tables into one file")
+    p.add_argument("output")
+    p.add_argument("--format", choices=["parquet", "arrow", "jsonl", "csv"],
+                   help="Output format (default: from the file extension)")
+    p.add_argument("--infer-types", action="store_true",
+                   help="Type text columns as int/float/bool when every value fits (default: keep as text)")
+    p.set_defaults(func=cmd_export)
+
+    args = parser.parse_args(argv)
+    return args.func(args) or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,260 @@
+import io
+import json
+import os
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+
+FORMATS = {
+    'parquet': ('.parquet', 'application/vnd.apache.parquet'),
+    'arrow': ('.arrow', 'application/vnd.apache.arrow.file'),
+    'jsonl': ('.jsonl', 'application/jsonl'),
+    'csv': ('.csv', 'text/csv'),
+}
+ARROW_FORMATS = ('parquet', 'arrow')
+
+_INT_PATTERN = r'-?\d{1,18}'
+# Leading zeros or a plus sign mark identifiers (ZIP codes, phone numbers), not numbers.
+_IDENTIFIER_PATTERN = r'\+|-?0\d'
+
+
+def arrow_available() -> bool:
+    return pa is not None
+
+
+def _require_arrow(fmt: str):
+    if pa is None:
+        raise ImportError(f"pyarrow is required for {fmt} export. Install it with: pip install pyarrow")
+
+
+def _normalise_value(value):
+    if isinstance(value, (dict, list, tuple)):
+        return json.dumps(value, default=str, ensure_ascii=False)
+    return value
+
+
+def infer_column_type(series: pd.Series, infer_types: bool = False) -> str:
+    """Pick one of 'int', 'float', 'bool', 'datetime' or 'string' for a column.
+
+    Columns that already have a typed dtype keep it. Object columns stay strings unless
+    infer_types is set, since LLM output is almost always text and identifiers like ZIP
+    codes or phone numbers look numeric. With infer_types, object columns are probed for
+    values that are all integers, all numbers or all true/false. Values with a leading
+    zero or a plus sign keep the column a string.
+    """
+    if pd.api.types.is_bool_dtype(series):
+        return 'bool'
+    if pd.api.types.is_integer_dtype(series):
+        return 'int'
+    if pd.api.types.is_float_dtype(series):
+        return 'float'
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return 'datetime'
+    if not infer_types:
+        return 'string'
+    non_null = series.dropna()
+    if non_null.empty or not all(isinstance(v, (str, int, float, bool)) for v in non_null):
+        return 'string'
+    text = non_null.astype(str).str.strip()
+    if text.eq('').any():
+        return 'string'
+    if text.str.match(_IDENTIFIER_PATTERN).any():
+        return 'string'
+    if text.str.fullmatch(_INT_PATTERN).all():
+        return 'int'
+    if pd.to_numeric(text, errors='coerce').notna().all():
+        return 'float'
+    if text.str.lower().isin(['true', 'false']).all():
+        return 'bool'
+    return 'string'
+
+
+def infer_schema(df: pd.DataFrame, infer_types: bool = False) -> Dict[str, str]:
+    return {str(col): infer_column_type(df[col], infer_types) for col in df.columns}
+
+
+def merge_schema(schema: Optional[Dict[str, str]], other: Dict[str, str]) -> Dict[str, str]:
+    """Union of two schemas. Columns whose types disagree are widened (int + float to float,
+    anything else to string) so values from either side survive the cast."""
+    merged = dict(schema or {})
+    for name, kind in other.items():
+        current = merged.get(name)
+        if current is None or current == kind:
+            merged[name] = kind
+        elif {current, kind} == {'int', 'float'}:
+            merged[name] = 'float'
+        else:
+            merged[name] = 'string'
+    return merged
+
+
+def conform(df: pd.DataFrame, schema: Dict[str, str]) -> tuple:
+    """Align a page's DataFrame to the schema: same column order, missing columns as nulls,
+    values cast to the column type. Returns (frame, {column: values_lost}, dropped_columns)."""
+    df = df.rename(columns=str)
+    out = {}
+    coerced = {}
+    for name, kind in schema.items():
+        if name not in df.columns:
+            out[name] = pd.Series([None] * len(df), index=df.index, dtype='object')
+            if kind != 'string':
+                out[name] = _cast(out[name], kind)
+            continue
+        column = df[name].map(_normalise_value) if df[name].dtype == object else df[name]
+        cast = _cast(column, kind)
+        lost = int((column.notna() & cast.isna()).sum())
+        if lost:
+            coerced[name] = lost
+        out[name] = cast
+    dropped = [c for c in df.columns if c not in schema]
+    return pd.DataFrame(out, index=df.index).reset_index(drop=True), coerced, dropped
+
+
+def _cast(series: pd.Series, kind: str) -> pd.Series:
+    if kind == 'int':
+        numbers = pd.to_numeric(series.astype('string').str.strip() if series.dtype == object else series,
+                                errors='coerce')
+        whole = numbers.where(numbers.isna() | (numbers % 1 == 0))
+        return whole.astype('Int64')
+    if kind == 'float':
+        return pd.to_numeric(series.astype('string').str.strip() if series.dtype == object else series,
+                             errors='coerce').astype('Float64')
+    if kind == 'bool':
+        if pd.api.types.is_bool_dtype(series):
+            return series.astype('boolean')
+        lowered = series.astype('string').str.strip().str.lower()
+        return lowered.map({'true': True, 'false': False}).astype('boolean')
+    if kind == 'datetime':
+        return pd.to_datetime(series, errors='coerce')
+    return series.astype('string')
+
+
+def arrow_schema(schema: Dict[str, str]):
+    _require_arrow('Arrow')
+    types = {
+        'int': pa.int64(),
+        'float': pa.float64(),
+        'bool': pa.bool_(),
+        'datetime': pa.timestamp('ns'),
+        'string': pa.string(),
+    }
+    return pa.schema([pa.field(name, types[kind]) for name, kind in schema.items()])
+
+
+class ExportWriter:
+    """Incremental writer that appends one page of rows at a time.
+
+    The schema is fixed by the first non-empty page (or passed in), so every page lands
+    in the same columns. Values a later page can't fit into it become nulls and are
+    counted in coerced_columns, and columns it lacks are listed in dropped_columns; when
+    all pages are known up front, pass merge_schema() of their inferred schemas to avoid
+    both. Parquet gets one row group per page, Arrow IPC one record batch per page, and
+    JSON Lines / CSV are appended without building the document in memory.
+    """
+
+    def __init__(self, path_or_buf, fmt: str = 'parquet', schema: Optional[Dict[str, str]] = None,
+                 infer_types: bool = False, compression: str = 'zstd'):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown export format: {fmt}. Choose from {', '.join(FORMATS)}")
+        if fmt in ARROW_FORMATS:
+            _require_arrow(fmt)
+        self.fmt = fmt
+        self.schema = dict(schema) if schema else None
+        self.infer_types = infer_types
+        self.compression = compression
+        self.rows_written = 0
+        self.pages_written = 0
+        self.coerced_values = 0
+        self.coerced_columns: Dict[str, int] = {}
+        self.dropped_columns: List[str] = []
+        self._owns_file = isinstance(path_or_buf, (str, os.PathLike))
+        self._path = path_or_buf if self._owns_file else None
+        self._buf = None if self._owns_file else path_or_buf
+        self._writer = None
+        self._file = None
+        self._empty_columns: List[str] = []
+
+    def write(self, df: pd.DataFrame):
+        if df is None or (df.empty and len(df.columns) == 0):
+            return
+        if self.schema is None:
+            if df.empty:
+                self._empty_columns = self._empty_columns or [str(c) for c in df.columns]
+                return
+            self.schema = infer_schema(df, self.infer_types)
+        frame, coerced, dropped = conform(df, self.schema)
+        for name, lost in coerced.items():
+            self.coerced_columns[name] = self.coerced_columns.get(name, 0) + lost
+            self.coerced_values += lost
+        self.dropped_columns.extend(c for c in dropped if c not in self.dropped_columns)
+        if frame.empty:
+            return
+        getattr(self, f"_write_{self.fmt}")(frame)
+        self.rows_written += len(frame)
+        self.pages_written += 1
+
+    def _table(self, frame):
+        return pa.Table.from_pandas(frame, schema=arrow_schema(self.schema), preserve_index=False)
+
+    def _write_parquet(self, frame):
+        table = self._table(frame)
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self._path or self._buf, table.schema, compression=self.compression)
+        self._writer.write_table(table)
+
+    def _write_arrow(self, frame):
+        table = self._table(frame)
+        if self._writer is None:
+            self._file = open(self._path, 'wb') if self._owns_file else self._buf
+            self._writer = pa.ipc.new_file(self._file, table.schema)
+        self._writer.write_table(table)
+
+    def _text_file(self):
+        if self._file is None:
+            self._file = open(self._path, 'w', encoding='utf-8', newline='') if self._owns_file else self._buf
+        return self._file
+
+    def _write_jsonl(self, frame):
+        f = self._text_file()
+        for record in frame.astype(object).where(frame.notna(), None).to_dict(orient='records'):
+            f.write(json.dumps(record, default=str, ensure_ascii=False, separators=(',', ':')))
+            f.write('\n')
+
+    def _write_csv(self, frame):
+        frame.to_csv(self._text_file(), header=self.pages_written == 0, index=False)
+
+    def close(self):
+        if self.fmt in ARROW_FORMATS and self._writer is None and (self.schema or self._empty_columns):
+            # Nothing was written; still leave a valid, empty file behind.
+            self.schema = self.schema or {name: 'string' for name in self._empty_columns}
+            empty = conform(pd.DataFrame(columns=list(self.schema)), self.schema)[0]
+            getattr(self, f"_write_{self.fmt}")(empty)
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._owns_file and self._file is not None:
+            self._file.close()
+        self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def export_dataframe(df: pd.DataFrame, fmt: str, infer_types: bool = False):
+    """Serialise a single DataFrame to bytes (parquet/arrow) or str (jsonl/csv)."""
+    buf = io.BytesIO() if fmt in ARROW_FORMATS else io.StringIO()
+    with ExportWriter(buf, fmt, infer_types=infer_types) as writer:
+        writer.write(df)
+    return buf.getvalue()
@@ -1,6 +1,3 @@
-from langchain_groq import ChatGroq
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import PydanticOutputParser
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 import json
@@ -8,6 +5,7 @@ import re
 import pandas as pd
 from bs4 import BeautifulSoup
 from cleaner import extract_text_content
+import metrics
 
 
 class TableRow(BaseModel):
@@ -48,6 +46,7 @@ def get_tpm_limit_for_model(model_name: str) -> int:
     return tpm_limits.get(model_name, 14000)
 
 
+@metrics.timed("smart_content_reduction")
 def smart_content_reduction(html_content: str, max_chars: int, user_query: str) -> str:
     if len(html_content) <= max_chars:
         return html_content
@@ -84,7 +83,49 @@ def smart_content_reduction(html_content: str, max_chars: int, user_query: str)
     return text_content
 
 
+@metrics.timed("parse_repair")
+def repair_llm_json(response_text: str) -> ExtractedTable:
+    json_match = re.search(r'```(?:json)?\s*(\{.*\})\s*```', response_text, re.DOTALL)
+    if json_match:
+        response_text = json_match.group(1)
+    else:
+        json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
+        if json_match:
+            response_text = json_match.group(0)
+    response_json = json.loads(response_text)
+    if isinstance(response_json.get('columns'), dict):
+        if 'data' in response_json['columns']:
+            response_json['columns'] = response_json['columns']['data']
+        else:
+            response_json['columns'] = list(response_json['columns'].keys()) if response_json['columns'] else []
+    if not isinstance(response_json.get('columns'), list):
+        if 'rows' in response_json and response_json['rows']:
+            first_row = response_json['rows'][0]
+            if isinstance(first_row, dict):
+                row_data = first_row.get('data', first_row)
+                if isinstance(row_data, dict):
+                    response_json['columns'] = list(row_data.keys())
+                else:
+                    response_json['columns'] = []
+        else:
+            response_json['columns'] = []
+    if 'rows' in response_json and isinstance(response_json['rows'], list):
+        fixed_rows = []
+        for row in response_json['rows']:
+            if isinstance(row, dict):
+                if 'data' in row:
+                    fixed_rows.append(row)
+                else:
+                    fixed_rows.append({'data': row})
+        response_json['rows'] = fixed_rows
+    return ExtractedTable(**response_json)
+
+
 def create_extraction_chain(groq_api_key: str, model_name: str = "llama-3.1-8b-instant"):
+    # LangChain/Groq are only needed once an LLM call is actually made.
+    from langchain_groq import ChatGroq
+    from langchain_core.prompts import ChatPromptTemplate
+    from langchain_core.output_parsers import PydanticOutputParser
     llm = ChatGroq(
         groq_api_key=groq_api_key,
         model_name=model_name,
@@ -141,7 +182,9 @@ def extract_tabular_data(
             user_query=user_query,
             format_instructions=format_instructions
         )
-        response = llm.invoke(prompt)
+        with metrics.span("llm_call", bytes_in=sum(len(m.content) for m in prompt), model=model_name) as llm_stage:
+            response = llm.invoke(prompt)
+            llm_stage.set(bytes_out=len(response.content))
         usage_info = {}
         try:
             if hasattr(response, 'response_metadata'):
@@ -205,45 +248,13 @@ def extract_tabular_data(
                             }
         except Exception as e:
             usage_info = {'error': str(e)}
+        llm_stage.set(total_tokens=usage_info.get('total_tokens', 0))
         try:
-            parsed_output = parser.parse(response.content)
+            with metrics.span("parse", bytes_in=len(response.content)):
+                parsed_output = parser.parse(response.content)
         except Exception as parse_error:
             try:
-                response_text = response.content
-                json_match = re.search(r'```(?:json)?\s*(\{.*\})\s*```', response_text, re.DOTALL)
-                if json_match:
-                    response_text = json_match.group(1)
-                else:
-                    json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-                    if json_match:
-                        response_text = json_match.group(0)
-                response_json = json.loads(response_text)
-                if isinstance(response_json.get('columns'), dict):
-                    if 'data' in response_json['columns']:
-                        response_json['columns'] = response_json['columns']['data']
-                    else:
-                        response_json['columns'] = list(response_json['columns'].keys()) if response_json['columns'] else []
-                if not isinstance(response_json.get('columns'), list):
-                    if 'rows' in response_json and response_json['rows']:
-                        first_row = response_json['rows'][0]
-                        if isinstance(first_row, dict):
-                            row_data = first_row.get('data', first_row)
-                            if isinstance(row_data, dict):
-                                response_json['columns'] = list(row_data.keys())
-                            else:
-                                response_json['columns'] = []
-                    else:
-                        response_json['columns'] = []
-                if 'rows' in response_json and isinstance(response_json['rows'], list):
-                    fixed_rows = []
-                    for row in response_json['rows']:
-                        if isinstance(row, dict):
-                            if 'data' in row:
-                                fixed_rows.append(row)
-                            else:
-                                fixed_rows.append({'data': row})
-                    response_json['rows'] = fixed_rows
-                parsed_output = ExtractedTable(**response_json)
+                parsed_output = repair_llm_json(response.content)
             except Exception as fix_error:
                 error_msg = f"Failed to parse LLM response. Original error: {str(parse_error)}. "
                 error_msg += f"Attempted fix also failed: {str(fix_error)}. "
@@ -266,6 +277,7 @@ def extract_tabular_data(
                 'dataframe': df,
                 'description': parsed_output.description,
                 'usage': usage_info,
+                'source': 'llm',
                 'error': None
             }
         else:
@@ -280,6 +292,7 @@ def extract_tabular_data(
                 'dataframe': empty_df,
                 'description': parsed_output.description or "No data found matching the query",
                 'usage': usage_info,
+                'source': 'llm',
                 'error': None
             }
     except Exception as e:
@@ -289,9 +302,10 @@ def extract_tabular_data(
             'dataframe': None,
             'description': None,
             'usage': {},
+            'source': 'llm',
             'error': str(e)
         }
 
 
-def dataframe_to_json(df: pd.DataFrame, orient: str = 'records') -> str:
-    return df.to_json(orient=orient, indent=2)
+def dataframe_to_json(df: pd.DataFrame, orient: str = 'records', indent: Optional[int] = 2) -> str:
+    return df.to_json(orient=orient, indent=indent)
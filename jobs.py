@@ -0,0 +1,227 @@
+import os
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, Optional
+
+import metrics
+from storage import get_store
+
+
+MAX_BROWSERS = int(os.getenv("MAX_BROWSERS", "2"))
+MAX_LLM_CALLS = int(os.getenv("MAX_LLM_CALLS", "4"))
+JOB_TTL_SECONDS = int(os.getenv("JOB_TTL_SECONDS", "3600"))
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, kind: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.status = QUEUED
+        self.message = POOLS[kind][1]
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.future = None
+        self._cancel = threading.Event()
+
+    @property
+    def active(self) -> bool:
+        return self.status not in FINISHED_STATES
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel.is_set()
+
+    def update(self, message: str):
+        self.check_cancelled()
+        self.message = message
+
+    def check_cancelled(self):
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    def cancel(self):
+        self._cancel.set()
+        if self.future is not None and self.future.cancel():
+            self._finish(CANCELLED, message="Cancelled before it started")
+
+    def _finish(self, status, result=None, error=None, message=""):
+        self.status = status
+        self.result = result
+        self.error = error
+        self.message = message
+        self.finished = time.time()
+
+
+# Each kind of job gets its own pool sized to the resource it needs, so jobs waiting for
+# a browser queue in front of the browser pool instead of holding threads other jobs need.
+POOLS = {
+    'fetch': (MAX_BROWSERS, "Waiting for a free browser..."),
+    'extract': (MAX_LLM_CALLS, "Waiting for a free LLM slot..."),
+}
+
+_executors: Dict[str, ThreadPoolExecutor] = {}
+_jobs: Dict[str, Job] = {}
+_lock = threading.Lock()
+
+
+def _get_executor(kind: str) -> ThreadPoolExecutor:
+    with _lock:
+        if kind not in _executors:
+            _executors[kind] = ThreadPoolExecutor(max_workers=POOLS[kind][0], thread_name_prefix=f"job-{kind}")
+        return _executors[kind]
+
+
+def _run(job: Job, func: Callable, args, kwargs):
+    if job.cancel_requested:
+        job._finish(CANCELLED, message="Cancelled before it started")
+        return
+    job.status = RUNNING
+    job.started = time.time()
+    try:
+        result = func(job, *args, **kwargs)
+    except JobCancelled:
+        job._finish(CANCELLED, message="Cancelled")
+    except Exception as e:
+        traceback.print_exc()
+        job._finish(FAILED, error=str(e), message="Failed")
+    else:
+        job._finish(DONE, result=result, message="Finished")
+
+
+def submit(kind: str, func: Callable, *args, **kwargs) -> Job:
+    """Run func(job, *args, **kwargs) on the shared pool for this kind of job and return its Job handle."""
+    if kind not in POOLS:
+        raise ValueError(f"Unknown job kind: {kind}. Choose from {', '.join(POOLS)}")
+    _prune()
+    job = Job(kind)
+    with _lock:
+        _jobs[job.id] = job
+    job.future = _get_executor(kind).submit(_run, job, func, args, kwargs)
+    return job
+
+
+def get_job(job_id: Optional[str]) -> Optional[Job]:
+    if not job_id:
+        return None
+    with _lock:
+        return _jobs.get(job_id)
+
+
+def cancel(job_id: str) -> bool:
+    job = get_job(job_id)
+    if job is None or not job.active:
+        return False
+    job.cancel()
+    return True
+
+
+def discard(job_id: Optional[str]):
+    with _lock:
+        _jobs.pop(job_id, None)
+
+
+def stats() -> Dict[str, int]:
+    with _lock:
+        jobs = list(_jobs.values())
+    return {
+        'queued': sum(1 for j in jobs if j.status == QUEUED),
+        'running': sum(1 for j in jobs if j.status == RUNNING),
+        'workers': sum(size for size, _ in POOLS.values()),
+        'max_browsers': MAX_BROWSERS,
+        'max_llm_calls': MAX_LLM_CALLS,
+    }
+
+
+def _prune():
+    cutoff = time.time() - JOB_TTL_SECONDS
+    with _lock:
+        expired = [job_id for job_id, job in _jobs.items() if job.finished and job.finished < cutoff]
+        for job_id in expired:
+            del _jobs[job_id]
+
+
+# The stage modules pull in selenium, bs4, langchain, pandas and pyarrow, so they are
+# imported inside the job functions rather than at app start-up.
+def fetch_and_clean(job: Job, url: str, collect_timing: bool = False, capture_network: bool = False) -> Dict[str, Any]:
+    from scraper import fetch_html_with_info
+    from cleaner import clean_html, get_html_stats, extract_text_content
+    store = get_store()
+    with (metrics.trace("fetch_and_clean") if collect_timing else nullcontext()) as fetch_trace:
+        job.update("Fetching website content...")
+        page_info = fetch_html_with_info(url, headless=True, capture_network=capture_network)
+        job.update("Cleaning HTML...")
+        cleaned_html = clean_html(page_info['html'], preserve_structure=True)
+        text_content = extract_text_content(cleaned_html)
+        html_stats = get_html_stats(cleaned_html)
+        job.check_cancelled()
+    json_responses = page_info.pop('json_responses', None)
+    return {
+        'page_info': {k: v for k, v in page_info.items() if k != 'html'},
+        'capture_key': store.put_object(json_responses) if json_responses else None,
+        'json_response_count': len(json_responses or []),
+        'cleaned_key': store.put_text(cleaned_html),
+        'text_key': store.put_text(text_content),
+        'html_stats': html_stats,
+        'timing': fetch_trace.as_dict() if fetch_trace else None,
+    }
+
+
+def extract(job: Job, cleaned_key: str, user_query: str, groq_api_key: str, model_name: str,
+            collect_timing: bool = False, capture_key: Optional[str] = None) -> Dict[str, Any]:
+    from api_capture import extract_from_json_responses
+    store = get_store()
+    with (metrics.trace("extract") if collect_timing else nullcontext()) as extract_trace:
+        result = None
+        if capture_key and capture_key in store:
+            job.update("Matching captured JSON API responses...")
+            result = extract_from_json_responses(store.get_object(capture_key), user_query)
+        if result is None:
+            from extractor import extract_tabular_data
+            html_content = store.get_text(cleaned_key)
+            job.update("🤖 AI is analyzing the HTML and extracting data...")
+            result = extract_tabular_data(
+                html_content=html_content,
+                user_query=user_query,
+                groq_api_key=groq_api_key,
+                model_name=model_name
+            )
+        job.check_cancelled()
+    # The DataFrame is stored on its own so the UI can keep the small result metadata and
+    # the table separately; result['data'] just duplicates its rows.
+    df = result.pop('dataframe', None)
+    result.pop('data', None)
+    result['dataframe_key'] = store.put_object(df) if df is not None else None
+    if df is not None and not df.empty:
+        from extractor import dataframe_to_json
+        from exporter import export_dataframe, arrow_available, ARROW_FORMATS
+        job.update("Preparing downloads...")
+        result['exports'] = {
+            'csv': store.put_text(df.to_csv(index=False)),
+            'json': store.put_text(dataframe_to_json(df, orient='records', indent=None)),
+            'jsonl': store.put_text(export_dataframe(df, 'jsonl')),
+        }
+        if arrow_available():
+            for fmt in ARROW_FORMATS:
+                result['exports'][fmt] = store.put_bytes(export_dataframe(df, fmt))
+    return {
+        'extraction_key': store.put_object(result),
+        'timing': extract_trace.as_dict() if extract_trace else None,
+    }
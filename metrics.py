@@ -0,0 +1,239 @@
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+_enabled = os.getenv("SCRAPER_METRICS", "").lower() in ("1", "true", "yes", "on")
+_local = threading.local()
+_lock = threading.Lock()
+_totals: Dict[str, Dict[str, float]] = {}
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    return _enabled or getattr(_local, 'trace', None) is not None
+
+
+def _rss_bytes() -> int:
+    if psutil is not None:
+        try:
+            return psutil.Process().memory_info().rss
+        except Exception:
+            return 0
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        return 0
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def set(self, **fields):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """A named, timed stage. Use as a context manager via span()."""
+
+    def __init__(self, name: str, bytes_in: int = 0, **fields):
+        self.name = name
+        self.bytes_in = bytes_in
+        self.bytes_out = 0
+        self.cache_hit: Optional[bool] = None
+        self.error: Optional[str] = None
+        self.fields: Dict[str, Any] = dict(fields)
+        self.start = 0.0
+        self.duration = 0.0
+        self.mem_delta = 0
+        self._rss_start = 0
+
+    def set(self, **fields):
+        for key, value in fields.items():
+            if key in ('bytes_in', 'bytes_out', 'cache_hit'):
+                setattr(self, key, value)
+            else:
+                self.fields[key] = value
+
+    def __enter__(self):
+        self._rss_start = _rss_bytes()
+        self.start = time.time()
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self._t0
+        self.mem_delta = _rss_bytes() - self._rss_start
+        if exc_type is not None:
+            self.error = exc_type.__name__
+        _record(self)
+        return False
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'start': self.start,
+            'duration_s': round(self.duration, 6),
+            'bytes_in': self.bytes_in,
+            'bytes_out': self.bytes_out,
+            'mem_delta_bytes': self.mem_delta,
+            'cache_hit': self.cache_hit,
+            'error': self.error,
+            **self.fields,
+        }
+
+
+class Trace:
+    """Collects every span finished on the current thread while active."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.spans: List[Span] = []
+        self.duration = 0.0
+
+    def breakdown(self) -> List[Dict[str, Any]]:
+        return [s.as_dict() for s in self.spans]
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'duration_s': round(self.duration, 6),
+            'spans': self.breakdown(),
+        }
+
+
+def span(name: str, bytes_in: int = 0, **fields):
+    """Return a timing span for `name`, or a shared no-op span when metrics are off."""
+    if not _enabled and getattr(_local, 'trace', None) is None:
+        return _NULL_SPAN
+    return Span(name, bytes_in=bytes_in, **fields)
+
+
+def timed(name: str):
+    """Decorator form of span(); sizes the first positional argument and the return value."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled and getattr(_local, 'trace', None) is None:
+                return func(*args, **kwargs)
+            first = args[0] if args else None
+            with Span(name, bytes_in=len(first) if isinstance(first, (str, bytes)) else 0) as stage:
+                result = func(*args, **kwargs)
+                if isinstance(result, (str, bytes)):
+                    stage.bytes_out = len(result)
+            return result
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def trace(name: str):
+    """Group the spans of one request so they can be shown as a breakdown."""
+    previous = getattr(_local, 'trace', None)
+    current = Trace(name)
+    _local.trace = current
+    t0 = time.perf_counter()
+    try:
+        yield current
+    finally:
+        current.duration = time.perf_counter() - t0
+        _local.trace = previous
+        if previous is not None:
+            previous.spans.extend(current.spans)
+
+
+def _record(s: Span):
+    current = getattr(_local, 'trace', None)
+    if current is not None:
+        current.spans.append(s)
+    with _lock:
+        totals = _totals.setdefault(s.name, {
+            'count': 0, 'errors': 0, 'cache_hits': 0, 'seconds': 0.0,
+            'bytes_in': 0, 'bytes_out': 0, 'mem_delta_bytes': 0,
+        })
+        totals['count'] += 1
+        totals['seconds'] += s.duration
+        totals['bytes_in'] += s.bytes_in or 0
+        totals['bytes_out'] += s.bytes_out or 0
+        totals['mem_delta_bytes'] += s.mem_delta
+        if s.error:
+            totals['errors'] += 1
+        if s.cache_hit:
+            totals['cache_hits'] += 1
+
+
+def snapshot() -> Dict[str, Dict[str, float]]:
+    with _lock:
+        return {name: dict(values) for name, values in _totals.items()}
+
+
+def reset():
+    with _lock:
+        _totals.clear()
+
+
+def to_prometheus(prefix: str = "scraper_stage") -> str:
+    metrics = [
+        ('count', 'counter', 'Number of completed spans'),
+        ('errors', 'counter', 'Number of spans that raised'),
+        ('cache_hits', 'counter', 'Number of spans served from a cache'),
+        ('seconds', 'counter', 'Total wall time spent in the stage'),
+        ('bytes_in', 'counter', 'Total input bytes handed to the stage'),
+        ('bytes_out', 'counter', 'Total output bytes produced by the stage'),
+        ('mem_delta_bytes', 'gauge', 'Summed RSS change across spans of the stage'),
+    ]
+    data = snapshot()
+    lines = []
+    for key, kind, help_text in metrics:
+        metric = f"{prefix}_{key}" + ("_total" if kind == 'counter' else "")
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} {kind}")
+        for stage in sorted(data):
+            lines.append(f'{metric}{{stage="{stage}"}} {data[stage][key]}')
+    return '\n'.join(lines) + '\n'
+
+
+def to_json_lines(spans: Optional[List[Dict[str, Any]]] = None) -> str:
+    """Serialise span dicts, or the per-stage totals when none are given, as JSON lines."""
+    if spans is None:
+        spans = [{'stage': name, **values} for name, values in sorted(snapshot().items())]
+    return ''.join(json.dumps(item, default=str) + '\n' for item in spans)
+
+
+def export(path: str, fmt: str = "prometheus"):
+    if fmt == "prometheus":
+        content = to_prometheus()
+    elif fmt == "jsonl":
+        content = to_json_lines()
+    else:
+        raise ValueError(f"Unknown metrics format: {fmt}")
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
@@ -13,6 +13,9 @@ import shutil
 import platform
 import subprocess
 import re
+import json
+import base64
+import metrics
 
 
 def get_chrome_path():
@@ -66,10 +69,18 @@ def get_chrome_version(chrome_path=None):
     return None
 
 
-def get_chrome_options(headless=True):
+MAX_CAPTURED_BODY_BYTES = 20 * 1024 * 1024
+XSSI_PREFIXES = (")]}'", "while(1);", "for(;;);")
+
+
+def get_chrome_options(headless=True, capture_network=False):
     """Get Chrome options configured for both local and cloud deployment."""
     chrome_options = Options()
     
+    if capture_network:
+        # Network.* events show up in the performance log, which we read back after load
+        chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+    
     # Set Chrome binary path if on Linux
     chrome_path = get_chrome_path()
     if chrome_path:
@@ -97,18 +108,12 @@ def get_chrome_options(headless=True):
     return chrome_options
 
 
-def fetch_html(url: str, timeout: int = 30, headless: bool = True) -> str:
-    if not url or not isinstance(url, str):
-        raise ValueError("Invalid URL provided")
-    if not url.startswith(('http://', 'https://')):
-        url = 'https://' + url
-    
-    chrome_options = get_chrome_options(headless)
-    driver = None
-    try:
-        # Check if Chrome is available and get version on Linux
-        chrome_path = None
-        chrome_version = None
+def create_driver(headless: bool = True, timeout: int = 30, capture_network: bool = False):
+    chrome_options = get_chrome_options(headless, capture_network)
+    # Check if Chrome is available and get version on Linux
+    chrome_path = None
+    chrome_version = None
+    with metrics.span("driver_resolution") as stage:
         if platform.system() == 'Linux':
             chrome_path = get_chrome_path()
             if not chrome_path:
@@ -145,17 +150,106 @@ def fetch_html(url: str, timeout: int = 30, headless: bool = True) -> str:
                     service = Service(ChromeDriverManager().install())
         else:
             # Windows/Mac - standard detection
+            stage.set(cache_hit=os.path.exists(os.path.expanduser('~/.wdm/drivers/chromedriver')))
             service = Service(ChromeDriverManager().install())
-        
+        stage.set(chrome_version=chrome_version)
+    
+    with metrics.span("chrome_launch"):
         driver = webdriver.Chrome(service=service, options=chrome_options)
+    try:
         driver.set_page_load_timeout(timeout)
+        if capture_network:
+            driver.execute_cdp_cmd('Network.enable', {})
+    except Exception:
+        # The caller never gets the driver, so shut Chrome down here instead of orphaning it.
+        driver.quit()
+        raise
+    return driver
+
+
+def _parse_json_body(body: str):
+    text = body.lstrip()
+    for prefix in XSSI_PREFIXES:
+        if text.startswith(prefix):
+            text = text[len(prefix):].lstrip()
+    if not text or text[0] not in '[{':
+        return None
+    try:
+        return json.loads(text)
+    except ValueError:
+        return None
+
+
+def collect_json_responses(driver, max_body_bytes: int = MAX_CAPTURED_BODY_BYTES) -> list:
+    """Read JSON XHR/fetch responses recorded in the performance log during page load."""
+    with metrics.span("network_capture") as stage:
+        candidates = {}
+        for entry in driver.get_log('performance'):
+            try:
+                message = json.loads(entry['message'])['message']
+            except (KeyError, ValueError, TypeError):
+                continue
+            if message.get('method') != 'Network.responseReceived':
+                continue
+            params = message.get('params', {})
+            response = params.get('response', {})
+            mime = (response.get('mimeType') or '').lower()
+            is_json = 'json' in mime or response.get('url', '').split('?')[0].endswith('.json')
+            if not is_json and params.get('type') not in ('XHR', 'Fetch'):
+                continue
+            candidates[params['requestId']] = {
+                'url': response.get('url', ''),
+                'status': response.get('status'),
+                'mime_type': mime,
+            }
+        responses = []
+        total_bytes = 0
+        for request_id, info in candidates.items():
+            try:
+                body = driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': request_id})
+            except WebDriverException:
+                continue  # Body already evicted or request never finished
+            content = body.get('body', '')
+            if body.get('base64Encoded'):
+                try:
+                    content = base64.b64decode(content).decode('utf-8', errors='replace')
+                except ValueError:
+                    continue
+            if len(content) > max_body_bytes:
+                continue
+            data = _parse_json_body(content)
+            if data is None:
+                continue
+            total_bytes += len(content)
+            responses.append({**info, 'size': len(content), 'data': data})
+        stage.set(bytes_out=total_bytes, responses=len(responses))
+    return responses
+
+
+def load_page(driver, url: str, timeout: int = 30):
+    with metrics.span("page_load", url=url):
         driver.get(url)
         WebDriverWait(driver, timeout).until(
             EC.presence_of_element_located((By.TAG_NAME, "body"))
         )
+    with metrics.span("render_wait"):
         time.sleep(2)
+    with metrics.span("page_source") as stage:
         html_content = driver.page_source
-        return html_content
+        stage.set(bytes_out=len(html_content))
+    return html_content
+
+
+def fetch_html(url: str, timeout: int = 30, headless: bool = True) -> str:
+    if not url or not isinstance(url, str):
+        raise ValueError("Invalid URL provided")
+    if not url.startswith(('http://', 'https://')):
+        url = 'https://' + url
+    
+    driver = None
+    try:
+        driver = create_driver(headless, timeout)
+        return load_page(driver, url, timeout)
     except TimeoutException:
         raise TimeoutException(f"Page failed to load within {timeout} seconds")
     except WebDriverException as e:
@@ -165,75 +259,30 @@ def fetch_html(url: str, timeout: int = 30, headless: bool = True) -> str:
             driver.quit()
 
 
-def fetch_html_with_info(url: str, timeout: int = 30, headless: bool = True) -> dict:
+def fetch_html_with_info(url: str, timeout: int = 30, headless: bool = True, capture_network: bool = False) -> dict:
     if not url or not isinstance(url, str):
         raise ValueError("Invalid URL provided")
     if not url.startswith(('http://', 'https://')):
         url = 'https://' + url
     
-    chrome_options = get_chrome_options(headless)
     driver = None
     try:
-        # Check if Chrome is available and get version on Linux
-        chrome_path = None
-        chrome_version = None
-        if platform.system() == 'Linux':
-            chrome_path = get_chrome_path()
-            if not chrome_path:
-                raise WebDriverException(
-                    "Chrome/Chromium not found on the server. "
-                    "Please ensure packages.txt includes chromium and the app has been redeployed."
-                )
-            chrome_version = get_chrome_version(chrome_path)
-        
-        # Use ChromeDriverManager with proper version matching for Chromium
-        if platform.system() == 'Linux' and chrome_path:
-            # For Chromium on Linux, we need to force webdriver-manager to get the LATEST driver
-            # The cached driver (114) is too old. Clear cache and download fresh.
-            try:
-                # Try to clear old cached driver first to force fresh download
-                wdm_cache_dir = os.path.expanduser('~/.wdm/drivers/chromedriver')
-                if os.path.exists(wdm_cache_dir):
-                    # Remove old cached drivers to force fresh download
-                    try:
-                        shutil.rmtree(wdm_cache_dir)
-                    except Exception:
-                        pass  # If we can't delete, continue anyway
-                
-                # Use Chromium type which should match better with Chromium browser
-                driver_manager = ChromeDriverManager(chrome_type=ChromeType.CHROMIUM)
-                service = Service(driver_manager.install())
-            except Exception:
-                try:
-                    # Fallback: try standard manager but it might use old cached driver
-                    driver_manager = ChromeDriverManager()
-                    service = Service(driver_manager.install())
-                except Exception:
-                    # Last resort
-                    service = Service(ChromeDriverManager().install())
-        else:
-            # Windows/Mac - standard detection
-            service = Service(ChromeDriverManager().install())
-        
-        driver = webdriver.Chrome(service=service, options=chrome_options)
-        driver.set_page_load_timeout(timeout)
-        driver.get(url)
-        WebDriverWait(driver, timeout).until(
-            EC.presence_of_element_located((By.TAG_NAME, "body"))
-        )
-        time.sleep(2)
-        html_content = driver.page_source
+        driver = create_driver(headless, timeout, capture_network)
+        html_content = load_page(driver, url, timeout)
         page_title = driver.title
         final_url = driver.current_url
-        return {
+        page_info = {
             'html': html_content,
             'title': page_title,
             'url': final_url
         }
+        if capture_network:
+            page_info['json_responses'] = collect_json_responses(driver)
+        return page_info
     except TimeoutException:
         raise TimeoutException(f"Page failed to load within {timeout} seconds")
     except WebDriverException as e:
         raise WebDriverException(f"WebDriver error: {str(e)}")
     finally:
         if driver:
-            driver.quit()
\ No newline at end of file
+            driver.quit()
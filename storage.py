@@ -0,0 +1,220 @@
+import io
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+import zlib
+from typing import Any, Dict, Iterator, List, Optional
+
+
+DEFAULT_CHUNK_CHARS = 50_000
+DEFAULT_MEMORY_LIMIT = 256 * 1024
+DEFAULT_TTL_SECONDS = 6 * 60 * 60
+
+
+class _Entry:
+    __slots__ = ('kind', 'path', 'blobs', 'offsets', 'total_chars', 'total_bytes', 'last_access')
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.path: Optional[str] = None
+        self.blobs: Optional[List[bytes]] = None
+        self.offsets: List[tuple] = []
+        self.total_chars = 0
+        self.total_bytes = 0
+        self.last_access = time.time()
+
+
+class PayloadStore:
+    """Process-wide store for large session payloads, referenced by key.
+
+    Text is split into chunks that are zlib-compressed one by one, so a single page of a
+    preview can be loaded without inflating the whole document. Payloads whose compressed
+    size exceeds `memory_limit` are spilled to a temp directory instead of kept in RAM.
+    """
+
+    def __init__(self, root: Optional[str] = None, chunk_chars: int = DEFAULT_CHUNK_CHARS,
+                 memory_limit: int = DEFAULT_MEMORY_LIMIT, ttl_seconds: int = DEFAULT_TTL_SECONDS):
+        self.root = root or tempfile.mkdtemp(prefix="anysite-payloads-")
+        os.makedirs(self.root, exist_ok=True)
+        self.chunk_chars = chunk_chars
+        self.memory_limit = memory_limit
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+
+    def put_text(self, text: str) -> str:
+        chunks = [text[i:i + self.chunk_chars] for i in range(0, len(text), self.chunk_chars)] or ['']
+        entry = _Entry('text')
+        entry.total_chars = len(text)
+        blobs = []
+        for chunk in chunks:
+            raw = chunk.encode('utf-8')
+            entry.total_bytes += len(raw)
+            blobs.append(zlib.compress(raw, 6))
+        return self._save(entry, blobs, [len(c) for c in chunks])
+
+    def put_bytes(self, data: bytes) -> str:
+        chunks = [data[i:i + self.chunk_chars] for i in range(0, len(data), self.chunk_chars)] or [b'']
+        entry = _Entry('bytes')
+        entry.total_bytes = len(data)
+        return self._save(entry, [zlib.compress(chunk, 6) for chunk in chunks], [0] * len(chunks))
+
+    def put_object(self, obj: Any) -> str:
+        raw = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+        entry = _Entry('object')
+        entry.total_bytes = len(raw)
+        return self._save(entry, [zlib.compress(raw, 6)], [0])
+
+    def _save(self, entry: _Entry, blobs: List[bytes], chunk_chars: List[int]) -> str:
+        key = uuid.uuid4().hex
+        compressed = sum(len(b) for b in blobs)
+        offset = 0
+        for blob, chars in zip(blobs, chunk_chars):
+            entry.offsets.append((offset, len(blob), chars))
+            offset += len(blob)
+        if compressed > self.memory_limit:
+            entry.path = os.path.join(self.root, key + ".bin")
+            with open(entry.path, 'wb') as f:
+                for blob in blobs:
+                    f.write(blob)
+        else:
+            entry.blobs = blobs
+        with self._lock:
+            self._entries[key] = entry
+        self.evict_expired()
+        return key
+
+    def _entry(self, key: str) -> _Entry:
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            raise KeyError(f"Payload {key} is no longer available")
+        entry.last_access = time.time()
+        return entry
+
+    def _read_blob(self, entry: _Entry, index: int) -> bytes:
+        if entry.blobs is not None:
+            return entry.blobs[index]
+        offset, length, _ = entry.offsets[index]
+        with open(entry.path, 'rb') as f:
+            f.seek(offset)
+            return f.read(length)
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def info(self, key: str) -> Dict[str, Any]:
+        entry = self._entry(key)
+        return {
+            'chars': entry.total_chars,
+            'bytes': entry.total_bytes,
+            'compressed_bytes': sum(length for _, length, _ in entry.offsets),
+            'chunks': len(entry.offsets),
+            'on_disk': entry.path is not None,
+        }
+
+    def chunk_count(self, key: str) -> int:
+        return len(self._entry(key).offsets)
+
+    def get_chunk(self, key: str, index: int) -> str:
+        entry = self._entry(key)
+        return zlib.decompress(self._read_blob(entry, index)).decode('utf-8')
+
+    def iter_bytes(self, key: str) -> Iterator[bytes]:
+        entry = self._entry(key)
+        for index in range(len(entry.offsets)):
+            yield zlib.decompress(self._read_blob(entry, index))
+
+    def iter_chunks(self, key: str) -> Iterator[str]:
+        for raw in self.iter_bytes(key):
+            yield raw.decode('utf-8')
+
+    def get_text(self, key: str) -> str:
+        return ''.join(self.iter_chunks(key))
+
+    def get_object(self, key: str) -> Any:
+        entry = self._entry(key)
+        return pickle.loads(zlib.decompress(self._read_blob(entry, 0)))
+
+    def open_stream(self, key: str) -> io.BufferedReader:
+        """Binary file-like view of a text (as UTF-8) or bytes payload, inflated one chunk at a time."""
+        return io.BufferedReader(_ChunkReader(self, key))
+
+    def delete(self, key: Optional[str]):
+        if not key:
+            return
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        if entry is not None and entry.path:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+    def evict_expired(self):
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            expired = [key for key, entry in self._entries.items() if entry.last_access < cutoff]
+        for key in expired:
+            self.delete(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        shutil.rmtree(self.root, ignore_errors=True)
+        os.makedirs(self.root, exist_ok=True)
+
+
+class _ChunkReader(io.RawIOBase):
+    # Only rewinding to the start is supported, which is what download widgets need.
+    def __init__(self, store: PayloadStore, key: str):
+        self._store = store
+        self._key = key
+        self.seek(0)
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if offset != 0 or whence != io.SEEK_SET:
+            raise io.UnsupportedOperation("payload streams can only be rewound to the start")
+        self._chunks = self._store.iter_bytes(self._key)
+        self._buffer = b''
+        self._position = 0
+        return 0
+
+    def readinto(self, b):
+        while not self._buffer:
+            try:
+                self._buffer = next(self._chunks)
+            except StopIteration:
+                return 0
+        n = min(len(b), len(self._buffer))
+        b[:n] = self._buffer[:n]
+        self._buffer = self._buffer[n:]
+        self._position += n
+        return n
+
+
+_store: Optional[PayloadStore] = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> PayloadStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = PayloadStore(root=os.getenv("PAYLOAD_STORE_DIR") or None)
+    return _store
@@ -0,0 +1,291 @@
+import json
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, List, Optional
+
+
+PENDING = "pending"
+FETCHED = "fetched"
+CLEANED = "cleaned"
+EXTRACTED = "extracted"
+FAILED = "failed"
+STAGES = (PENDING, FETCHED, CLEANED, EXTRACTED)
+FINAL_STATES = (EXTRACTED, FAILED)
+
+DEFAULT_LEASE_SECONDS = 120
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_RETRY_BACKOFF = 30
+
+
+class LeaseLost(Exception):
+    """Raised when a worker touches an item whose lease it no longer holds."""
+
+
+def make_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+
+class WorkItem:
+    def __init__(self, row: Dict[str, Any]):
+        self.id = row['id']
+        self.url = row['url']
+        self.query = row['query']
+        self.state = row['state']
+        self.attempts = row['attempts']
+        self.last_error = row['last_error']
+        self.lease_owner = row['lease_owner']
+        self.artifacts: Dict[str, str] = json.loads(row['artifacts'] or '{}')
+
+    def __repr__(self):
+        return f"WorkItem(id={self.id}, url={self.url!r}, state={self.state!r}, attempts={self.attempts})"
+
+
+class WorkQueue(ABC):
+    """Durable crawl/extract queue with per-URL stage checkpoints and leases.
+
+    Workers claim an item (taking a lease), heartbeat while they work, checkpoint after each
+    stage with advance(), and finish with complete() or fail(). An item whose lease expires
+    (worker crashed) becomes claimable again and resumes from its last checkpointed stage.
+    Items that fail max_attempts times are dead-lettered in the FAILED state.
+    """
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    @abstractmethod
+    def enqueue(self, urls: Iterable[str], query: str = "", priority: int = 0) -> int: ...
+
+    @abstractmethod
+    def claim(self, worker_id: str) -> Optional[WorkItem]: ...
+
+    @abstractmethod
+    def heartbeat(self, item_id: int, worker_id: str) -> bool: ...
+
+    @abstractmethod
+    def advance(self, item_id: int, worker_id: str, state: str, artifacts: Optional[Dict[str, str]] = None): ...
+
+    @abstractmethod
+    def complete(self, item_id: int, worker_id: str, artifacts: Optional[Dict[str, str]] = None): ...
+
+    @abstractmethod
+    def fail(self, item_id: int, worker_id: str, error: str) -> str: ...
+
+    @abstractmethod
+    def release(self, item_id: int, worker_id: str): ...
+
+    @abstractmethod
+    def requeue_failed(self) -> int: ...
+
+    @abstractmethod
+    def unfinished(self) -> int: ...
+
+    @abstractmethod
+    def stats(self) -> Dict[str, int]: ...
+
+    @abstractmethod
+    def items(self, state: Optional[str] = None) -> List[WorkItem]: ...
+
+
+class SQLiteWorkQueue(WorkQueue):
+    """WorkQueue on a single SQLite file (WAL mode), safe across processes on one host.
+
+    Claims run inside BEGIN IMMEDIATE transactions so two workers can never lease the same
+    item. Every write made on behalf of a worker is conditional on that worker still holding
+    the lease.
+    """
+
+    def __init__(self, path: str, lease_seconds: int = DEFAULT_LEASE_SECONDS,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS, retry_backoff: int = DEFAULT_RETRY_BACKOFF):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS items (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                url TEXT NOT NULL,
+                query TEXT NOT NULL DEFAULT '',
+                state TEXT NOT NULL DEFAULT 'pending',
+                priority INTEGER NOT NULL DEFAULT 0,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT,
+                lease_owner TEXT,
+                lease_expires REAL,
+                not_before REAL NOT NULL DEFAULT 0,
+                artifacts TEXT NOT NULL DEFAULT '{}',
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                UNIQUE (url, query)
+            );
+            DROP INDEX IF EXISTS items_claimable;
+            CREATE INDEX IF NOT EXISTS items_claim_order ON items (priority DESC, id)
+                WHERE state NOT IN ('extracted', 'failed');
+        """)
+
+    def close(self):
+        self._conn.close()
+
+    def enqueue(self, urls: Iterable[str], query: str = "", priority: int = 0) -> int:
+        now = time.time()
+        rows = [(url.strip(), query, priority, now, now) for url in urls if url and url.strip()]
+        with self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO items (url, query, priority, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            return self._conn.total_changes - before
+
+    def claim(self, worker_id: str) -> Optional[WorkItem]:
+        """Lease the next claimable item. Re-claiming an item whose lease expired counts the
+        abandoned attempt (its worker died without calling fail()), so an item that keeps
+        killing workers is dead-lettered after max_attempts like any other failure."""
+        now = time.time()
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            while True:
+                # The state filter is spelled out (not bound) so SQLite can match it to the partial
+                # index and walk unfinished items in claim order instead of scanning and sorting.
+                row = self._conn.execute(
+                    """SELECT * FROM items
+                       WHERE state NOT IN ('extracted', 'failed') AND not_before <= ?
+                         AND (lease_owner IS NULL OR lease_expires < ?)
+                       ORDER BY priority DESC, id LIMIT 1""",
+                    (now, now),
+                ).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+                item = dict(row)
+                if item['lease_owner'] is not None:
+                    item['attempts'] += 1
+                    item['last_error'] = f"Lease held by {item['lease_owner']} expired without a result"
+                    if item['attempts'] >= self.max_attempts:
+                        self._conn.execute(
+                            """UPDATE items SET state = ?, attempts = ?, last_error = ?, lease_owner = NULL,
+                               lease_expires = NULL, updated_at = ? WHERE id = ?""",
+                            (FAILED, item['attempts'], item['last_error'], now, item['id']),
+                        )
+                        continue
+                self._conn.execute(
+                    """UPDATE items SET lease_owner = ?, lease_expires = ?, attempts = ?, last_error = ?,
+                       updated_at = ? WHERE id = ?""",
+                    (worker_id, now + self.lease_seconds, item['attempts'], item['last_error'], now, item['id']),
+                )
+                self._conn.execute("COMMIT")
+                break
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+        item['lease_owner'] = worker_id
+        return WorkItem(item)
+
+    def _owned_update(self, item_id: int, worker_id: str, assignments: str, params: tuple):
+        cursor = self._conn.execute(
+            f"UPDATE items SET {assignments}, updated_at = ? WHERE id = ? AND lease_owner = ?",
+            (*params, time.time(), item_id, worker_id),
+        )
+        if cursor.rowcount == 0:
+            raise LeaseLost(f"Worker {worker_id} no longer holds the lease on item {item_id}")
+
+    def _merged_artifacts(self, item_id: int, artifacts: Optional[Dict[str, str]]) -> str:
+        row = self._conn.execute("SELECT artifacts FROM items WHERE id = ?", (item_id,)).fetchone()
+        merged = json.loads(row['artifacts'] or '{}') if row else {}
+        merged.update(artifacts or {})
+        return json.dumps(merged)
+
+    def heartbeat(self, item_id: int, worker_id: str) -> bool:
+        try:
+            self._owned_update(item_id, worker_id, "lease_expires = ?", (time.time() + self.lease_seconds,))
+        except LeaseLost:
+            return False
+        return True
+
+    def advance(self, item_id: int, worker_id: str, state: str, artifacts: Optional[Dict[str, str]] = None):
+        if state not in STAGES:
+            raise ValueError(f"Unknown stage: {state}")
+        self._owned_update(
+            item_id, worker_id, "state = ?, artifacts = ?, lease_expires = ?",
+            (state, self._merged_artifacts(item_id, artifacts), time.time() + self.lease_seconds),
+        )
+
+    def complete(self, item_id: int, worker_id: str, artifacts: Optional[Dict[str, str]] = None):
+        self._owned_update(
+            item_id, worker_id, "state = ?, artifacts = ?, last_error = NULL, lease_owner = NULL, lease_expires = NULL",
+            (EXTRACTED, self._merged_artifacts(item_id, artifacts)),
+        )
+
+    def fail(self, item_id: int, worker_id: str, error: str) -> str:
+        """Record a failed attempt. Retries later with exponential backoff, or dead-letters the
+        item once it has used max_attempts. Returns the item's new state."""
+        row = self._conn.execute("SELECT attempts, state FROM items WHERE id = ?", (item_id,)).fetchone()
+        attempts = row['attempts'] + 1
+        if attempts >= self.max_attempts:
+            state, not_before = FAILED, 0
+        else:
+            state, not_before = row['state'], time.time() + self.retry_backoff * 2 ** (attempts - 1)
+        self._owned_update(
+            item_id, worker_id,
+            "state = ?, attempts = ?, last_error = ?, not_before = ?, lease_owner = NULL, lease_expires = NULL",
+            (state, attempts, error[:2000], not_before),
+        )
+        return state
+
+    def release(self, item_id: int, worker_id: str):
+        try:
+            self._owned_update(item_id, worker_id, "lease_owner = NULL, lease_expires = NULL", ())
+        except LeaseLost:
+            pass
+
+    def requeue_failed(self) -> int:
+        """Give every dead-lettered item a fresh set of attempts, resuming from its last checkpoint."""
+        with self._conn:
+            cursor = self._conn.execute(
+                """UPDATE items SET state = CASE
+                       WHEN json_extract(artifacts, '$.cleaned') IS NOT NULL THEN ?
+                       WHEN json_extract(artifacts, '$.raw') IS NOT NULL THEN ?
+                       ELSE ? END,
+                   attempts = 0, not_before = 0, updated_at = ?
+                   WHERE state = ?""",
+                (CLEANED, FETCHED, PENDING, time.time(), FAILED),
+            )
+            return cursor.rowcount
+
+    def unfinished(self) -> int:
+        """Items not yet extracted or dead-lettered, including leased ones and ones in retry backoff."""
+        return self._conn.execute(
+            "SELECT COUNT(*) FROM items WHERE state NOT IN ('extracted', 'failed')"
+        ).fetchone()[0]
+
+    def stats(self) -> Dict[str, int]:
+        now = time.time()
+        counts = {state: 0 for state in (*STAGES, FAILED)}
+        for row in self._conn.execute("SELECT state, COUNT(*) AS n FROM items GROUP BY state"):
+            counts[row['state']] = row['n']
+        counts['leased'] = self._conn.execute(
+            "SELECT COUNT(*) FROM items WHERE lease_owner IS NOT NULL AND lease_expires >= ?", (now,)
+        ).fetchone()[0]
+        counts['total'] = sum(counts[state] for state in (*STAGES, FAILED))
+        return counts
+
+    def items(self, state: Optional[str] = None) -> List[WorkItem]:
+        if state:
+            rows = self._conn.execute("SELECT * FROM items WHERE state = ? ORDER BY id", (state,))
+        else:
+            rows = self._conn.execute("SELECT * FROM items ORDER BY id")
+        return [WorkItem(dict(row)) for row in rows]